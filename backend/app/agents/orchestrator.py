@@ -1,12 +1,8 @@
 from typing import TypedDict, List, Dict, Optional
 from langgraph.graph import StateGraph, END
-import google.generativeai as genai
-from app.config import get_settings
+from app.services.llm import generate_content
 from app.services.rag import search_memories
 
-settings = get_settings()
-genai.configure(api_key=settings.google_api_key)
-
 # Define the state structure
 class AgentState(TypedDict):
     messages: List[dict]
@@ -490,7 +486,7 @@ def find_best_mentor(user_message: str, user_situation: str = "") -> Dict:
 # IMPROVED MINDFULNESS/EMPATHY AGENT
 # ============================================================================
 
-def mindfulness_agent(state: AgentState) -> AgentState:
+async def mindfulness_agent(state: AgentState) -> AgentState:
     """
     Intake agent - understands, resonates, and selects a mentor path.
     """
@@ -526,8 +522,6 @@ LENGTH: 3-6 sentences, concise but caring.
     try:
         print(f"[EMPATH] Processing message: {user_message[:50]}...")
 
-        model = genai.GenerativeModel('gemini-2.5-flash')
-
         full_prompt = f"""{system_prompt}
 
 CONVERSATION SO FAR:
@@ -538,13 +532,11 @@ User's latest message: {user_message}
 Respond with warmth, depth, and genuine care:"""
 
         print("[EMPATH] Calling Gemini API...")
-        response = model.generate_content(
+        response = await generate_content(
             full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.8,
-                max_output_tokens=2048,  # Increased from 800
-                top_p=0.95,
-            )
+            temperature=0.8,
+            max_output_tokens=2048,  # Increased from 800
+            top_p=0.95,
         )
 
         if response.candidates:
@@ -591,7 +583,7 @@ Respond with warmth, depth, and genuine care:"""
 # SITUATION DISCOVERY AGENT
 # ============================================================================
 
-def discovery_agent(state: AgentState) -> AgentState:
+async def discovery_agent(state: AgentState) -> AgentState:
     """
     Discovery agent - Asks clarifying questions before engaging the mentor
     """
@@ -626,20 +618,16 @@ Keep your response brief (2-3 sentences) and end with a thoughtful question.
 Be warm and show you're genuinely interested in understanding their unique situation."""
 
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-
         full_prompt = f"""{system_prompt}
 
 User said: {user_message}
 
 Respond with warmth and ask a clarifying question to understand their situation better:"""
 
-        response = model.generate_content(
+        response = await generate_content(
             full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=1024,  # Increased from 300
-            )
+            temperature=0.7,
+            max_output_tokens=1024,  # Increased from 300
         )
 
         if response.candidates:
@@ -743,8 +731,6 @@ CHARACTER NOTES:
 
 RESPONSE LENGTH: Write 3-5 sentences."""
 
-        model = genai.GenerativeModel('gemini-2.5-flash')
-
         # Include conversation history for context
         conversation = "\n".join([
             f"{'User' if m['role'] == 'user' else mentor['name']}: {m['content']}"
@@ -761,13 +747,11 @@ User: {user_message}
 {mentor['name']}:"""
 
         print(f"[WISE MENTOR] Calling Gemini as {mentor['name']}...")
-        response = model.generate_content(
+        response = await generate_content(
             full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.75,
-                max_output_tokens=1200,
-                top_p=0.95,
-            )
+            temperature=0.75,
+            max_output_tokens=1200,
+            top_p=0.95,
         )
 
         if response.candidates:
@@ -1,5 +1,7 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     # Supabase
@@ -11,10 +13,104 @@ class Settings(BaseSettings):
     openai_api_key: str = ""  # Optional (not used, keeping for compatibility)
     google_api_key: str  # For everything (Gemini)
 
+    # LLM generation
+    llm_model: str = "gemini-2.5-flash"
+    llm_max_concurrency: int = 32  # Concurrent Gemini generations per worker
+    llm_timeout_seconds: float = 60.0
+
+    # RAG
+    embedding_dimensions: int = 768  # text-embedding-004 output size; 256 needs supabase_embedding_256.sql
+    embedding_max_concurrency: int = 16  # Concurrent Gemini embedding calls per worker
+    db_max_concurrency: int = 16  # Concurrent Supabase calls per worker
+    db_pool_max_connections: int = 32  # Pooled HTTP connections to Supabase per worker
+    db_pool_max_keepalive: int = 16  # Idle connections kept warm (no TLS setup on reuse)
+    db_pool_keepalive_seconds: float = 60.0
+    db_http2: bool = True  # Multiplex requests over one connection where the server supports it
+    db_timeout_seconds: float = 30.0
+    db_connect_timeout_seconds: float = 5.0
+    db_pool_timeout_seconds: float = 10.0  # Wait for a free pooled connection
+    embedding_cache_max_entries: int = 2048
+    embedding_cache_ttl_seconds: float = 3600.0
+    embedding_batch_max_size: int = 32  # Gemini accepts up to 100 texts per batch call
+    embedding_batch_max_wait_ms: float = 10.0
+    embedding_store_enabled: bool = True  # Persistent content-hash store (SQLite)
+    embedding_store_path: str = ".cache/embeddings.sqlite3"
+    embedding_store_max_entries: int = 100_000
+    rag_match_threshold: float = 0.7  # Minimum cosine similarity for a semantic match
+    rag_snippet_length: int = 1000  # Max characters of each retrieved entry
+    rag_chunk_threshold_chars: int = 1200  # Longer entries get chunk-level embeddings
+    rag_chunk_size_chars: int = 600
+    rag_hnsw_ef_search: Optional[int] = None  # pgvector HNSW candidate list size (default 40)
+    rag_candidate_multiplier: int = 3  # Candidates fetched per result for reranking
+    rag_ranking_enabled: bool = True  # Blend similarity with recency and importance
+    rag_relevance_weight: float = 0.7
+    rag_recency_weight: float = 0.2
+    rag_importance_weight: float = 0.1
+    rag_recency_half_life_days: float = 30.0
+    rag_mmr_enabled: bool = True  # Diversify top-k with maximal marginal relevance
+    rag_mmr_lambda: float = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+    retrieval_cache_enabled: bool = True  # Reuse search results until the user's next ingest
+    retrieval_cache_max_entries: int = 4096
+    retrieval_cache_ttl_seconds: float = 300.0  # Bounds staleness from other workers' writes
+
+    # Near-duplicate detection at ingest
+    dedup_enabled: bool = True
+    dedup_window: int = 200  # Recent entries per user compared against
+    dedup_minhash_threshold: float = 0.8  # Estimated Jaccard of word 3-gram sets
+    dedup_similarity_threshold: float = 0.92  # Embedding cosine similarity
+    dedup_index_memory_mb: float = 64.0
+    dedup_index_ttl_seconds: float = 600.0  # Reload to pick up other workers' writes
+
+    # In-process per-user vector index (hot cache in front of pgvector)
+    vector_index_enabled: bool = False
+    vector_index_memory_mb: float = 256.0
+    vector_index_ttl_seconds: float = 600.0  # Reload to pick up other workers' writes
+    vector_index_dtype: str = "int8"  # "int8" (~4x smaller), "float16" or "float32"; also used by dedup
+    vector_index_rescore: bool = True  # Re-score top quantized candidates with the float32 query
+
+    # Lexical (BM25) retrieval and hybrid search
+    rag_search_mode: str = "vector"  # "vector", "lexical" or "hybrid"
+    lexical_index_enabled: bool = True  # BM25 fallback when query embedding fails
+    lexical_index_memory_mb: float = 128.0
+    lexical_index_ttl_seconds: float = 600.0  # Reload to pick up other workers' writes
+
+    # Embedding backfill (entries stored without vectors)
+    embedding_backfill_enabled: bool = False  # Run periodically inside the API process
+    embedding_backfill_interval_seconds: float = 900.0
+    embedding_backfill_batch_size: int = 50
+    embedding_backfill_max_per_minute: int = 600
+    embedding_backfill_checkpoint_path: str = ".embedding_backfill.json"
+
+    # Digital self analysis
+    digital_self_max_entries: int = 50  # Most recent entries sent to the model per analysis
+    digital_self_max_chars: int = 15000
+    digital_self_strategy: str = "clusters"  # Full analysis: "clusters", "mapreduce" or "recent"
+    digital_self_clusters: int = 8  # k for k-means over entry embeddings
+    digital_self_cluster_representatives: int = 3  # Entries sent per cluster
+    digital_self_chunk_tokens: int = 8000  # Journal text per map-step call
+    digital_self_map_concurrency: int = 8  # Concurrent map-step calls per worker
+    digital_self_llm_timeout_seconds: float = 300.0  # Analysis and reduce calls generate far more than a chat reply
+
+    # Background jobs (digital self regeneration)
+    job_store_backend: str = "memory"  # "memory" or "supabase" (needs supabase_background_jobs.sql)
+    job_workers: int = 2  # Concurrent jobs per API worker
+    job_max_attempts: int = 3  # Only LLM failures (timeouts, API errors, unusable responses) are retried
+    job_retry_base_seconds: float = 5.0  # Doubles after each failed attempt
+    job_stale_seconds: float = 900.0  # Active jobs not updated for this long stop blocking new ones
+    job_retention_seconds: float = 3600.0  # Finished jobs kept by the in-memory store
+
     # App Config
     environment: str = "development"
     cors_origins: str = "http://localhost:3000"
 
+    @field_validator("embedding_dimensions")
+    @classmethod
+    def check_embedding_dimensions(cls, value: int) -> int:
+        # Each size needs its own column and search RPC in the database
+        if value not in (768, 256):
+            raise ValueError("embedding_dimensions must be 768 or 256")
+        return value
+
     class Config:
         env_file = ".env"
         case_sensitive = False
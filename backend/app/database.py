@@ -1,3 +1,7 @@
+import asyncio
+import inspect
+import httpx
+from postgrest import AsyncPostgrestClient
 from supabase import create_client, Client
 from app.config import get_settings
 
@@ -6,6 +10,62 @@ settings = get_settings()
 # Initialize Supabase client
 supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
 
+# Caps how many Supabase calls are in flight at once
+_query_semaphore = asyncio.Semaphore(settings.db_max_concurrency)
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client on a shared keep-alive connection pool"""
+
+    def create_session(self, base_url, headers, timeout, verify=True) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(
+                settings.db_timeout_seconds,
+                connect=settings.db_connect_timeout_seconds,
+                pool=settings.db_pool_timeout_seconds
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.db_pool_max_connections,
+                max_keepalive_connections=settings.db_pool_max_keepalive,
+                keepalive_expiry=settings.db_pool_keepalive_seconds
+            ),
+            verify=verify,
+            follow_redirects=True,
+            http2=settings.db_http2,
+        )
+
+
+# Same REST endpoint and credentials as the sync client above
+db = PooledPostgrestClient(
+    f"{settings.supabase_url}/rest/v1",
+    headers={
+        "apiKey": settings.supabase_key,
+        "Authorization": f"Bearer {settings.supabase_key}",
+    },
+)
+
 def get_supabase() -> Client:
     """Dependency for getting Supabase client"""
     return supabase
+
+def get_db() -> PooledPostgrestClient:
+    """Async, connection-pooled client for query builders passed to run_query"""
+    return db
+
+async def close_db() -> None:
+    """Close pooled connections (app shutdown)"""
+    await db.aclose()
+
+async def run_query(query):
+    """
+    Execute a Supabase query builder without blocking the event loop
+
+    Builders from get_db() are awaited on the pooled connections; builders
+    from the sync client still run in a worker thread.
+    """
+    async with _query_semaphore:
+        if inspect.iscoroutinefunction(query.execute):
+            return await query.execute()
+        return await asyncio.to_thread(query.execute)
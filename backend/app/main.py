@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+import asyncio
 import os
 
 # Load environment variables
@@ -38,6 +39,26 @@ app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(meditation.router, prefix="/api/meditation", tags=["meditation"])
 app.include_router(digital_self.router, prefix="/api/digital-self", tags=["digital-self"])
 
+# Background workers
+from app.config import get_settings
+from app.services.embedding_backfill import run_backfill_forever
+from app.database import close_db
+from app.services.digital_self_analyzer import regeneration_queue
+
+@app.on_event("startup")
+async def start_background_workers():
+    regeneration_queue.start()
+    if get_settings().embedding_backfill_enabled:
+        app.state.backfill_task = asyncio.create_task(run_backfill_forever())
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    backfill_task = getattr(app.state, "backfill_task", None)
+    if backfill_task:
+        backfill_task.cancel()
+    await regeneration_queue.stop()
+    await close_db()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
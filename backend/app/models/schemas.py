@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # Journal Models
@@ -15,6 +15,15 @@ class JournalEntry(BaseModel):
 class JournalSearchRequest(BaseModel):
     query: str
     top_k: int = 3
+    mode: Optional[Literal["vector", "lexical", "hybrid"]] = None
+    ef_search: Optional[int] = Field(None, ge=1, le=1000)  # HNSW recall/latency knob
+
+class JournalBatchSearchQuery(JournalSearchRequest):
+    id: Optional[str] = None  # Result key; defaults to the query text
+    user_id: Optional[str] = None  # Admin tooling: search another user's journal
+
+class JournalBatchSearchRequest(BaseModel):
+    queries: List[JournalBatchSearchQuery] = Field(..., min_length=1, max_length=100)
 
 class MentorInfo(BaseModel):
     id: Optional[str] = None
@@ -4,18 +4,24 @@ Endpoints for generating and retrieving digital self insights
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 from app.services.digital_self_analyzer import (
     get_digital_self_insights,
-    regenerate_digital_self
+    regeneration_queue
 )
+from app.services.job_queue import FINISHED_STATUSES
+import json
 
 router = APIRouter()
 
 # Demo user UUID for hackathon
 DEMO_USER_ID = "00000000-0000-0000-0000-000000000001"
 
+# How often a job event stream re-reads the store (jobs run by another worker)
+JOB_EVENTS_POLL_SECONDS = 2.0
+
 
 class DigitalSelfResponse(BaseModel):
     coreValues: List[str]
@@ -29,6 +35,8 @@ class DigitalSelfResponse(BaseModel):
 
 class RegenerateRequest(BaseModel):
     user_id: Optional[str] = None
+    # "incremental" updates the latest insight with new entries only; "full" starts over
+    mode: Literal["incremental", "full"] = "incremental"
 
 
 @router.get("/insights")
@@ -78,42 +86,95 @@ async def get_insights(user_id: str = DEMO_USER_ID):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/regenerate")
+def job_payload(job: Dict) -> Dict:
+    return {
+        "jobId": job["id"],
+        "status": job["status"],
+        "stage": job.get("stage"),
+        "progress": job.get("progress"),
+        "attempts": job.get("attempts", 0),
+        "error": job.get("error"),
+        "result": job.get("result"),
+        "createdAt": job.get("created_at"),
+        "updatedAt": job.get("updated_at"),
+    }
+
+
+@router.post("/regenerate", status_code=202)
 async def regenerate_insights(request: RegenerateRequest):
     """
-    Regenerate digital self insights by analyzing journal entries
+    Start regenerating digital self insights in the background
 
-    This will:
-    1. Fetch all journal entries for the user
-    2. Use LLM to analyze and extract insights
+    The analysis runs as a job:
+    1. Fetch journal entries for the user (incremental: only those written
+       since the last analysis)
+    2. Use LLM to analyze and extract insights (incremental: update the
+       previous insight)
     3. Save insights to database
-    4. Return the new insights
+
+    Returns the job immediately; poll /jobs/{jobId} or stream
+    /jobs/{jobId}/events for progress and the new insights. While a job is
+    active for the user, the same job is returned instead of starting another.
     """
     user_id = request.user_id or DEMO_USER_ID
 
     try:
-        insights = await regenerate_digital_self(user_id)
-
-        return {
-            "status": "success",
-            "message": f"Analyzed {insights.get('journalEntriesAnalyzed', 0)} journal entries",
-            "insights": {
-                "coreValues": insights.get("coreValues", []),
-                "emotionalPatterns": insights.get("emotionalPatterns", []),
-                "identityThemes": insights.get("identityThemes", []),
-                "tensions": insights.get("tensions", []),
-                "keywords": insights.get("keywords", [])
-            }
-        }
+        job, created = await regeneration_queue.submit(user_id, {"mode": request.mode})
+        return {**job_payload(job), "deduplicated": not created}
 
     except Exception as e:
-        print(f"Error regenerating digital self: {str(e)}")
+        print(f"Error starting digital self regeneration: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to regenerate insights: {str(e)}"
+            detail=f"Failed to start regeneration: {str(e)}"
         )
 
 
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, progress and (once succeeded) result of a regeneration job"""
+    job = await regeneration_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_payload(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """Server-Sent Events: the job's status on every change, until it finishes"""
+
+    async def job_events():
+        last = None
+        while True:
+            job = await regeneration_queue.get(job_id)
+            if not job:
+                yield f"data: {json.dumps({'type': 'error', 'message': 'Job not found'})}\n\n"
+                return
+
+            payload = job_payload(job)
+            if payload != last:
+                yield f"data: {json.dumps({'type': 'status', **payload})}\n\n"
+                last = payload
+            else:
+                yield ": keep-alive\n\n"
+
+            if job["status"] in FINISHED_STATUSES:
+                yield f"data: {json.dumps({'type': 'complete', 'jobId': job_id, 'status': job['status']})}\n\n"
+                return
+
+            await regeneration_queue.wait_for_change(job_id, timeout=JOB_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        job_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/status")
 async def get_status(user_id: str = DEMO_USER_ID):
     """
@@ -121,18 +182,22 @@ async def get_status(user_id: str = DEMO_USER_ID):
     """
     try:
         insights = await get_digital_self_insights(user_id)
+        active_job = await regeneration_queue.find_active(user_id)
+        active_job_id = active_job["id"] if active_job else None
 
         if not insights:
             return {
                 "hasAnalysis": False,
                 "journalEntriesAnalyzed": 0,
-                "lastAnalysisDate": None
+                "lastAnalysisDate": None,
+                "activeJobId": active_job_id
             }
 
         return {
             "hasAnalysis": True,
             "journalEntriesAnalyzed": insights.get("journalEntriesAnalyzed", 0),
-            "lastAnalysisDate": insights.get("analysisDate")
+            "lastAnalysisDate": insights.get("analysisDate"),
+            "activeJobId": active_job_id
         }
 
     except Exception as e:
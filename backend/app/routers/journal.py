@@ -1,14 +1,26 @@
 from fastapi import APIRouter, HTTPException
-from app.models.schemas import JournalEntryCreate, JournalSearchRequest
-from app.services.rag import ingest_journal, search_memories
+from app.models.schemas import JournalEntryCreate, JournalSearchRequest, JournalBatchSearchRequest
+from app.services.rag import (
+    ingest_journal,
+    search_memories,
+    search_memory_records,
+    search_memory_records_batch,
+    generate_embedding,
+    embedding_cache,
+    embedding_batcher,
+    embedding_store,
+    vector_index,
+    lexical_index,
+    dedup_index,
+    retrieval_cache,
+)
+from app.services.llm import generate_content
 from app.config import get_settings
 from typing import Dict, List, Optional
 from pydantic import BaseModel
-import google.generativeai as genai
 
 router = APIRouter()
 settings = get_settings()
-genai.configure(api_key=settings.google_api_key)
 
 # Demo user UUID for hackathon (bypassing auth)
 DEMO_USER_ID = "00000000-0000-0000-0000-000000000001"
@@ -76,13 +88,10 @@ Remember:
 """
 
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(
+        response = await generate_content(
             system_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=500,
-            )
+            temperature=0.7,
+            max_output_tokens=500,
         )
 
         response_text = response.text
@@ -147,13 +156,10 @@ The result should read like a single, thoughtful journal entry.
 Write 2-4 paragraphs maximum."""
 
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(
+        response = await generate_content(
             system_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.6,
-                max_output_tokens=600,
-            )
+            temperature=0.6,
+            max_output_tokens=600,
         )
         return response.text
     except Exception as e:
@@ -171,8 +177,18 @@ async def ingest_entry(entry: JournalEntryCreate, user_id: str = DEMO_USER_ID) -
         print(f"[JOURNAL] Ingesting entry for user: {user_id}")
         print(f"[JOURNAL] Content length: {len(entry.content)} chars")
 
+        # Embed the entry once: the same vector finds similar previous
+        # entries (document-to-document) and is stored with the new row
+        try:
+            entry_embedding = await generate_embedding(entry.content)
+        except Exception as embed_error:
+            print(f"[JOURNAL] Entry embedding failed: {str(embed_error)}")
+            entry_embedding = None
+
         # Get previous entries for context
-        previous_entries = await search_memories(user_id, entry.content, top_k=3)
+        previous_entries = await search_memories(
+            user_id, entry.content, top_k=3, query_embedding=entry_embedding
+        )
 
         # Generate follow-up questions
         analysis = await generate_follow_up_questions(entry.content, previous_entries)
@@ -185,7 +201,7 @@ async def ingest_entry(entry: JournalEntryCreate, user_id: str = DEMO_USER_ID) -
         }
 
         # Ingest the initial entry
-        result = await ingest_journal(user_id, entry.content)
+        result = await ingest_journal(user_id, entry.content, embedding=entry_embedding)
 
         return JournalResponse(
             status="success",
@@ -217,20 +233,17 @@ async def process_follow_up(request: JournalFollowUpRequest, user_id: str = DEMO
         )
 
         # Ingest the synthesized entry (this is the richer version)
-        result = await ingest_journal(user_id, synthesized_entry)
+        result = await ingest_journal(user_id, synthesized_entry, source="synthesized")
 
         # Generate new insight based on the deeper exploration
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        insight_response = model.generate_content(
+        insight_response = await generate_content(
             f"""Based on this journal entry and self-exploration, provide a brief, warm
             observation (1-2 sentences) that might help the person see a pattern or
             feel understood:
 
             {synthesized_entry}""",
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=150,
-            )
+            temperature=0.7,
+            max_output_tokens=150,
         )
 
         # Clear the session
@@ -252,19 +265,82 @@ async def process_follow_up(request: JournalFollowUpRequest, user_id: str = DEMO
 @router.post("/search")
 async def search_entries(request: JournalSearchRequest, user_id: str = DEMO_USER_ID) -> Dict:
     """
-    Search journal entries using semantic similarity
+    Search journal entries using semantic, lexical (BM25) or hybrid retrieval
     """
     try:
-        memories = await search_memories(user_id, request.query, request.top_k)
+        matches = await search_memory_records(
+            user_id, request.query, request.top_k, mode=request.mode, ef_search=request.ef_search
+        )
         return {
             "query": request.query,
-            "results": memories,
-            "count": len(memories)
+            "mode": request.mode or settings.rag_search_mode,
+            "results": [match["content"] for match in matches],
+            "matches": matches,
+            "count": len(matches)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/search/batch")
+async def search_entries_batch(request: JournalBatchSearchRequest, user_id: str = DEMO_USER_ID) -> Dict:
+    """
+    Run many searches in one request (evaluation jobs, dashboards)
+
+    All query embeddings are generated in a single batch call and the
+    searches run concurrently. Results are keyed by each query's id (or its
+    text); a query may set user_id to search another user's journal.
+    """
+    keys = [item.id or item.query for item in request.queries]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="Query keys must be unique; set a distinct id per query")
+
+    try:
+        searches = [
+            {
+                "user_id": item.user_id or user_id,
+                "query": item.query,
+                "top_k": item.top_k,
+                "mode": item.mode,
+                "ef_search": item.ef_search
+            }
+            for item in request.queries
+        ]
+        all_matches = await search_memory_records_batch(searches)
+        return {
+            "results": {
+                key: {
+                    "query": search["query"],
+                    "user_id": search["user_id"],
+                    "mode": search["mode"] or settings.rag_search_mode,
+                    "results": [match["content"] for match in matches],
+                    "matches": matches,
+                    "count": len(matches)
+                }
+                for key, search, matches in zip(keys, searches, all_matches)
+            },
+            "count": len(keys)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/cache/stats")
+async def get_cache_stats() -> Dict:
+    """
+    Counters for the in-process embedding and retrieval caches, batcher, search and duplicate indexes
+    """
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "embedding_store": embedding_store.stats() if embedding_store else None,
+        "vector_index": vector_index.stats(),
+        "lexical_index": lexical_index.stats(),
+        "dedup_index": dedup_index.stats(),
+        "retrieval_cache": retrieval_cache.stats()
+    }
+
+
 @router.get("/session")
 async def get_session(user_id: str = DEMO_USER_ID) -> Dict:
     """
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
-import google.generativeai as genai
-from app.config import get_settings
+from app.services.llm import generate_content
 from app.services.rag import ingest_journal, search_memories
 from app.services.user_personalization import (
     get_personalization_context,
@@ -16,8 +15,6 @@ import re
 import time
 
 router = APIRouter()
-settings = get_settings()
-genai.configure(api_key=settings.google_api_key)
 
 # Demo user UUID for hackathon
 DEMO_USER_ID = "00000000-0000-0000-0000-000000000001"
@@ -170,8 +167,6 @@ async def get_stage_content(stage_id: str):
         return {"error": "Stage not found"}
 
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-
         system_prompt = f"""You are a meditation guide with a voice like warm honey - soft, slow, and deeply calming.
 
 CRITICAL STYLE RULES:
@@ -185,12 +180,10 @@ CRITICAL STYLE RULES:
 
 {stage['prompt']}"""
 
-        response = model.generate_content(
+        response = await generate_content(
             system_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.85,
-                max_output_tokens=2048,  # Increased from 600 to prevent truncation
-            )
+            temperature=0.85,
+            max_output_tokens=2048,  # Increased from 600 to prevent truncation
         )
 
         # Extract content properly to avoid interruption
@@ -368,8 +361,7 @@ async def save_reflection(request: ReflectionRequest, user_id: str = DEMO_USER_I
         print(f"[MEDITATION] Saving reflection for user: {user_id}")
 
         # Generate a gentle insight based on their reflection
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        insight_response = model.generate_content(
+        insight_response = await generate_content(
             f"""Someone just finished a meditation and shared this reflection:
 
 "{request.content}"
@@ -380,15 +372,13 @@ Write a brief, warm response (2-3 sentences) that:
 - Offers a gentle observation or affirmation
 
 Keep it personal and soft, not clinical. Like a kind friend responding.""",
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.8,
-                max_output_tokens=150,
-            )
+            temperature=0.8,
+            max_output_tokens=150,
         )
 
         # Save to journal/memories with meditation context
         entry_content = f"[Meditation Reflection]\n{request.content}"
-        await ingest_journal(user_id, entry_content)
+        await ingest_journal(user_id, entry_content, source="meditation")
 
         return ReflectionResponse(
             status="success",
@@ -423,14 +413,11 @@ async def meditation_session(websocket: WebSocket):
                 stage = next((s for s in MEDITATION_STAGES if s["id"] == stage_id), None)
                 if stage:
                     try:
-                        model = genai.GenerativeModel('gemini-2.5-flash')
-                        response = model.generate_content(
+                        response = await generate_content(
                             f"""You are a meditation guide with a voice like warm honey.
                             {stage['prompt']}""",
-                            generation_config=genai.types.GenerationConfig(
-                                temperature=0.85,
-                                max_output_tokens=2048,  # Increased from 600 to prevent truncation
-                            )
+                            temperature=0.85,
+                            max_output_tokens=2048,  # Increased from 600 to prevent truncation
                         )
 
                         # Extract content properly to avoid interruption
@@ -514,8 +501,6 @@ async def stream_meditation_stage(stage_id: str, user_id: str = DEMO_USER_ID):
             except Exception as e:
                 print(f"[MEDITATION] Could not fetch journal context: {e}")
 
-            model = genai.GenerativeModel('gemini-2.5-flash')
-
             # Enhanced prompt for continuous meditation guidance with personalization
             continuous_prompt = f"""You are a meditation guide with a voice like warm honey - soft, slow, and deeply calming.
 
@@ -558,12 +543,10 @@ PERSONALIZATION EXAMPLES:
 Write at least 500-800 words of flowing, gentle, PERSONALIZED meditation guidance.
 Make {user_name} feel truly seen and cared for."""
 
-            response = model.generate_content(
+            response = await generate_content(
                 continuous_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.85,
-                    max_output_tokens=3072,  # Even higher for continuous content
-                )
+                temperature=0.85,
+                max_output_tokens=3072,  # Even higher for continuous content
             )
 
             # Extract full content
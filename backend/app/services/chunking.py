@@ -0,0 +1,45 @@
+"""
+Chunking Service
+Splits long journal entries into passages for chunk-level embeddings
+"""
+
+import re
+from typing import List
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_into_chunks(text: str, max_chars: int = 600) -> List[str]:
+    """
+    Pack paragraphs (or sentences, for oversized paragraphs) into passages
+    of at most max_chars characters, preserving order
+    """
+    pieces = []
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in SENTENCE_END.split(paragraph):
+            # Hard-wrap the rare sentence that is longer than a whole chunk
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+
+    return chunks
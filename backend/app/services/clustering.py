@@ -0,0 +1,75 @@
+"""
+Clustering Service
+Spherical k-means over unit-normalized embeddings, vectorized in NumPy
+
+Used to pick a handful of representative journal entries per recurring
+theme, so a prompt can cover the whole history at constant size.
+"""
+
+import numpy as np
+from typing import List, Tuple
+from app.services.vector_index import normalize_rows
+
+
+def _init_centroids(vectors: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding on cosine distance; fewer than k if the data has fewer distinct points"""
+    centroids = [vectors[rng.integers(len(vectors))]]
+    distance = 1.0 - vectors @ centroids[0]
+    for _ in range(1, k):
+        weights = np.maximum(distance, 0.0) ** 2
+        if weights.sum() <= 1e-12:
+            break
+        chosen = vectors[rng.choice(len(vectors), p=weights / weights.sum())]
+        centroids.append(chosen)
+        distance = np.minimum(distance, 1.0 - vectors @ chosen)
+    return np.stack(centroids)
+
+
+def kmeans(vectors: np.ndarray, k: int, max_iterations: int = 50, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster unit vectors by cosine similarity
+
+    Returns (labels, centroids); centroids are unit vectors and every
+    returned cluster is non-empty.
+    """
+    k = max(1, min(k, len(vectors)))
+    rng = np.random.default_rng(seed)
+    centroids = _init_centroids(vectors, k, rng)
+
+    for _ in range(max_iterations):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=len(centroids))
+        # Empty clusters are dropped rather than re-seeded
+        updated = normalize_rows(sums[counts > 0])
+        if updated.shape == centroids.shape and np.allclose(updated, centroids, atol=1e-6):
+            break
+        centroids = updated
+
+    labels = np.argmax(vectors @ centroids.T, axis=1)
+    return labels, centroids
+
+
+def representatives(
+    vectors: np.ndarray,
+    labels: np.ndarray,
+    centroids: np.ndarray,
+    per_cluster: int
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (member rows, representative rows) per cluster, largest cluster first
+
+    Representatives are the members closest to their centroid, i.e. the
+    most typical entries of the cluster.
+    """
+    similarity = np.einsum("ij,ij->i", vectors, centroids[labels])
+    clusters = []
+    for cluster in range(len(centroids)):
+        members = np.flatnonzero(labels == cluster)
+        if not len(members):
+            continue
+        closest = members[np.argsort(-similarity[members], kind="stable")[:per_cluster]]
+        clusters.append((members, closest))
+    clusters.sort(key=lambda cluster: -len(cluster[0]))
+    return clusters
@@ -0,0 +1,253 @@
+"""
+Dedup Service
+Near-duplicate detection for journal entries and diversity reranking for
+retrieval results.
+
+A journaling session stores both the raw entry and the synthesized version,
+and clients occasionally resubmit the same text. At ingest time each new
+entry is compared against the user's recent entries by MinHash signature
+(near-identical text) and by embedding cosine similarity (paraphrases such
+as raw vs synthesized); the shorter of a duplicate pair is superseded by the
+longer one. At query time, MMR reranking keeps near-identical memories from
+filling every top-k slot.
+"""
+
+import hashlib
+import re
+import numpy as np
+from typing import Dict, List, Optional
+from app.services.vector_index import normalize_rows, parse_embedding
+from app.services.quantized_vectors import QuantizedMatrix
+from app.services.user_index_cache import EntryLoader, UserIndexCache
+
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_PATTERN = re.compile(r"\w+")
+RESCORE_MARGIN = 0.05  # Quantized scores this close to the threshold are re-scored precisely
+
+# Fixed seed so signatures are comparable across processes and restarts
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """Word n-grams of the lowercased text (the whole text if it is shorter)"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of the text's shingle set, or None for empty text"""
+    grams = set(shingles(text))
+    if not grams:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little") for gram in grams),
+        dtype=np.uint64,
+        count=len(grams)
+    )
+    # (a * x + b) mod p for every permutation and shingle at once
+    permuted = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def signature_similarity(signatures: np.ndarray) -> np.ndarray:
+    """Pairwise estimated Jaccard similarity between rows of a signature matrix"""
+    return (signatures[:, None, :] == signatures[None, :, :]).mean(axis=-1)
+
+
+class UserDuplicateIndex:
+    """MinHash signatures and embeddings of one user's most recent entries"""
+
+    def __init__(self, window: int, dimensions: int = 768, dtype: str = "float32"):
+        self.window = window
+        self.dimensions = dimensions
+        self.ids: List[str] = []
+        self.lengths: List[int] = []
+        self.signatures = np.zeros((0, NUM_PERMUTATIONS), dtype=np.uint64)
+        self.has_signature = np.zeros(0, dtype=bool)
+        self.embeddings = QuantizedMatrix(dimensions, dtype)
+        self.has_embedding = np.zeros(0, dtype=bool)
+
+    def add(self, entry_id: str, content: str, embedding: Optional[np.ndarray] = None) -> None:
+        signature = minhash_signature(content)
+        usable = embedding is not None and embedding.shape[-1] == self.dimensions
+
+        self.ids.append(entry_id)
+        self.lengths.append(len(content))
+        self.signatures = np.vstack([
+            self.signatures,
+            signature if signature is not None else np.zeros(NUM_PERMUTATIONS, dtype=np.uint64)
+        ])
+        self.has_signature = np.append(self.has_signature, signature is not None)
+        self.embeddings.append(normalize_rows(embedding) if usable else np.zeros(self.dimensions, dtype=np.float32))
+        self.has_embedding = np.append(self.has_embedding, usable)
+
+        # Only the most recent entries are kept
+        if len(self.ids) > self.window:
+            self._keep(np.arange(len(self.ids)) >= len(self.ids) - self.window)
+
+    def remove(self, entry_id: str) -> None:
+        if entry_id in self.ids:
+            self._keep(np.asarray([existing != entry_id for existing in self.ids], dtype=bool))
+
+    def _keep(self, mask: np.ndarray) -> None:
+        self.ids = [entry_id for entry_id, keep in zip(self.ids, mask) if keep]
+        self.lengths = [length for length, keep in zip(self.lengths, mask) if keep]
+        self.signatures = self.signatures[mask]
+        self.has_signature = self.has_signature[mask]
+        self.embeddings.keep(mask)
+        self.has_embedding = self.has_embedding[mask]
+
+    @property
+    def nbytes(self) -> int:
+        return self.signatures.nbytes + self.embeddings.nbytes
+
+    def find(
+        self,
+        content: str,
+        embedding: Optional[List[float]],
+        minhash_threshold: float,
+        similarity_threshold: float,
+    ) -> Optional[Dict]:
+        """The closest recent entry that counts as a near-duplicate, if any"""
+        if not self.ids:
+            return None
+
+        jaccard = np.zeros(len(self.ids), dtype=np.float32)
+        signature = minhash_signature(content)
+        if signature is not None:
+            jaccard = (self.signatures == signature).mean(axis=1).astype(np.float32)
+            jaccard[~self.has_signature] = 0.0
+
+        similarity = np.zeros(len(self.ids), dtype=np.float32)
+        if embedding is not None:
+            query = normalize_rows(np.asarray(embedding, dtype=np.float32))
+            if query.shape[-1] == self.dimensions:
+                similarity = self.embeddings.approximate_scores(query)
+                near = np.flatnonzero(similarity >= similarity_threshold - RESCORE_MARGIN)
+                if len(near) and not self.embeddings.exact:
+                    similarity[near] = self.embeddings.rescore(query, near)
+                similarity[~self.has_embedding] = 0.0
+
+        duplicate = (jaccard >= minhash_threshold) | (similarity >= similarity_threshold)
+        if not duplicate.any():
+            return None
+
+        score = np.where(duplicate, np.maximum(jaccard, similarity), -1.0)
+        best = int(np.argmax(score))
+        return {
+            "id": self.ids[best],
+            "length": self.lengths[best],
+            "jaccard": float(jaccard[best]),
+            "similarity": float(similarity[best]),
+        }
+
+
+class DuplicateIndexCache(UserIndexCache):
+    """LRU of per-user duplicate indexes bounded by a memory budget"""
+
+    def __init__(
+        self,
+        loader: EntryLoader,
+        window: int,
+        memory_budget_bytes: int,
+        ttl_seconds: float,
+        dimensions: int = 768,
+        dtype: str = "float32"
+    ):
+        super().__init__(loader, memory_budget_bytes, ttl_seconds)
+        self.window = window
+        self.dimensions = dimensions
+        self.dtype = dtype
+        self.duplicates = 0
+
+    def _build(self, user_id: str, rows: List[Dict]) -> UserDuplicateIndex:
+        index = UserDuplicateIndex(self.window, self.dimensions, self.dtype)
+        # Loader returns newest first; add oldest first so the window trims correctly
+        for row in reversed(rows):
+            index.add(row["id"], row["content"], parse_embedding(row.get("embedding")))
+        return index
+
+    async def find(
+        self,
+        user_id: str,
+        content: str,
+        embedding: Optional[List[float]],
+        minhash_threshold: float,
+        similarity_threshold: float,
+    ) -> Optional[Dict]:
+        index = await self.get(user_id)
+        duplicate = index.find(content, embedding, minhash_threshold, similarity_threshold)
+        if duplicate:
+            self.duplicates += 1
+        return duplicate
+
+    def add_entry(self, user_id: str, entry_id: str, content: str, embedding: Optional[List[float]]) -> None:
+        """Write-through on ingest; unloaded users pick the row up on first load"""
+        index = self.loaded(user_id)
+        if index is None:
+            return
+        index.add(entry_id, content, np.asarray(embedding, dtype=np.float32) if embedding is not None else None)
+        self.updated(user_id)
+
+    def stats(self) -> Dict:
+        return {
+            **super().stats(),
+            "entries": sum(len(index.ids) for index in self._indexes.values()),
+            "duplicates": self.duplicates,
+        }
+
+
+def _relevance(record: Dict) -> float:
+    """Ranking (or retriever) score of a record; unranked recency fill-ins score zero"""
+    if record.get("score") is not None:
+        return float(record["score"])
+    if record.get("match_type") == "recent":
+        return 0.0
+    for key in ("fusion_score", "similarity", "lexical_score"):
+        if record.get(key) is not None:
+            return float(record[key])
+    return 0.0
+
+
+def mmr_rerank(records: List[Dict], top_k: int, lambda_: float = 0.7) -> List[Dict]:
+    """
+    Maximal marginal relevance over retrieved records
+
+    Redundancy is the estimated Jaccard similarity of the records' MinHash
+    signatures, so it works for every retrieval mode without fetching vectors.
+    """
+    if len(records) <= 1:
+        return records[:top_k]
+
+    relevance = np.asarray([_relevance(record) for record in records], dtype=np.float32)
+    if relevance.max() > 0:
+        relevance /= relevance.max()
+
+    signatures = [minhash_signature(record["content"]) for record in records]
+    present = np.asarray([signature is not None for signature in signatures], dtype=bool)
+    matrix = np.stack([
+        signature if signature is not None else np.zeros(NUM_PERMUTATIONS, dtype=np.uint64)
+        for signature in signatures
+    ])
+    redundancy = signature_similarity(matrix).astype(np.float32)
+    redundancy[~present, :] = 0.0
+    redundancy[:, ~present] = 0.0
+
+    selected = []
+    remaining = np.ones(len(records), dtype=bool)
+    max_redundancy = np.zeros(len(records), dtype=np.float32)
+    for _ in range(min(top_k, len(records))):
+        scores = lambda_ * relevance - (1 - lambda_) * max_redundancy
+        scores[~remaining] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        remaining[best] = False
+        max_redundancy = np.maximum(max_redundancy, redundancy[best])
+
+    return [records[i] for i in selected]
@@ -3,15 +3,28 @@ Digital Self Analyzer Service
 Analyzes journal entries to extract personal insights using LLM
 """
 
-import google.generativeai as genai
 from app.config import get_settings
-from app.database import get_supabase
-from typing import Dict, List
+from app.database import get_db, run_query
+from app.services.llm import LLMError, generate_content, is_llm_error
+from app.services.digital_self_mapreduce import chunk_entries, merge_analyses, number_items, resolve_reduced
+from app.services.clustering import kmeans, representatives
+from app.services.rag import EMBEDDING_DIMENSIONS, EMBEDDING_SELECT, load_user_entries
+from app.services.vector_index import normalize_rows, parse_embedding
+from app.services.job_queue import JobQueue, ProgressCallback, create_job_store
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import json
+import numpy as np
 
 settings = get_settings()
-genai.configure(api_key=settings.google_api_key)
-supabase = get_supabase()
+supabase = get_db()
+
+ANALYSIS_MODES = ("incremental", "full")
+FULL_STRATEGIES = ("clusters", "mapreduce", "recent")
+ENTRY_OVERHEAD_CHARS = 16  # "Entry N:" header and separator around each entry in a prompt
+
+# Bounds concurrent per-chunk analyses across all map-reduce runs
+_map_semaphore = asyncio.Semaphore(settings.digital_self_map_concurrency)
 
 ANALYSIS_PROMPT = """You are a thoughtful psychologist analyzing someone's journal entries to understand their inner world.
 
@@ -49,65 +62,145 @@ Journal Entries to Analyze:
 Return ONLY the JSON object, no other text.
 """
 
-async def analyze_journal_entries(user_id: str) -> Dict:
-    """
-    Analyze all journal entries for a user and extract digital self insights
+UPDATE_PROMPT = """You are a thoughtful psychologist maintaining an evolving portrait of someone's inner world, built from their journal.
 
-    Returns:
-        Dict with coreValues, emotionalPatterns, identityThemes, tensions, keywords
-    """
+Below is their current portrait, followed by the journal entries they have written since it was last updated. Revise the portrait in light of the new entries:
+- Keep what the new writing still supports
+- Refine or replace what it changes
+- Add anything new that has clearly emerged
+Respect the same limits: 5 core values, 3-4 emotional patterns, 3-4 identity themes, 3 tensions, 5 keywords.
 
-    # Fetch all journal entries for the user
-    result = supabase.table("journal_entries")\
-        .select("content, created_at")\
-        .eq("user_id", user_id)\
-        .order("created_at", desc=False)\
-        .execute()
+IMPORTANT: Return ONLY a valid JSON object with this exact structure:
+{{
+  "coreValues": ["Value1", "Value2", ...],
+  "emotionalPatterns": ["Pattern 1", "Pattern 2", ...],
+  "identityThemes": [
+    {{"name": "The Observer", "description": "Brief description"}},
+    ...
+  ],
+  "tensions": ["Between X and Y", ...],
+  "keywords": ["word1", "word2", ...]
+}}
 
-    if not result.data or len(result.data) == 0:
-        raise Exception("No journal entries found for analysis")
+Current Portrait:
+---
+{{previous}}
+---
 
-    # Prepare journal entries for analysis
-    entries_text = "\n\n".join([
-        f"Entry {i+1} ({entry['created_at'][:10]}):\n{entry['content']}"
-        for i, entry in enumerate(result.data)
-    ])
+New Journal Entries:
+---
+{{entries}}
+---
+
+Return ONLY the JSON object, no other text.
+"""
+
+REDUCE_PROMPT = """You are a thoughtful psychologist combining several partial analyses of one person's journal into a single portrait.
+
+The journal was split into {{count}} consecutive chunks (chunk 1 is the oldest) and each chunk was analyzed separately. Below is every item those analyses produced, each with an id and the chunk it came from.
 
-    # Limit to last 50 entries or 15000 chars to avoid token limits
-    entries_list = result.data[-50:] if len(result.data) > 50 else result.data
-    entries_text = "\n\n".join([
+Your task:
+- Group the items within each section that describe the same thing, even when worded differently (e.g. "Authenticity" and "Being true to myself")
+- Give each group one clear wording in the style of its section
+- List the ids of every item in the group
+- Return the groups that best capture this person, most central first: at most 7 core values, 6 emotional patterns, 6 identity themes, 5 tensions and 7 keywords
+
+IMPORTANT: Return ONLY a valid JSON object with this exact structure:
+{{
+  "coreValues": [{{"text": "Value", "ids": ["v1", "v7"]}}, ...],
+  "emotionalPatterns": [{{"text": "Pattern sentence", "ids": ["p2"]}}, ...],
+  "identityThemes": [
+    {{"name": "The Observer", "description": "Brief description", "ids": ["i1", "i4"]}},
+    ...
+  ],
+  "tensions": [{{"text": "Between X and Y", "ids": ["t3"]}}, ...],
+  "keywords": [{{"text": "word", "ids": ["k5", "k9"]}}, ...]
+}}
+
+Partial Analyses:
+---
+{{items}}
+---
+
+Return ONLY the JSON object, no other text.
+"""
+
+async def _fetch_recent_entries(user_id: str) -> List[Dict]:
+    """The user's most recent active entries, oldest first"""
+    result = await run_query(
+        supabase.table("journal_entries")
+        .select("content, created_at")
+        .eq("user_id", user_id)
+        .is_("superseded_by", "null")
+        .order("created_at", desc=True)
+        .limit(settings.digital_self_max_entries)
+    )
+    return list(reversed(result.data or []))
+
+
+async def _fetch_new_entries(user_id: str, since: str) -> List[Dict]:
+    """
+    Active entries created after since, oldest first
+
+    At most one more than DIGITAL_SELF_MAX_ENTRIES, so callers can tell
+    whether everything new fits in one incremental update.
+    """
+    result = await run_query(
+        supabase.table("journal_entries")
+        .select("content, created_at")
+        .eq("user_id", user_id)
+        .is_("superseded_by", "null")
+        .gt("created_at", since)
+        .order("created_at")
+        .limit(settings.digital_self_max_entries + 1)
+    )
+    return result.data or []
+
+
+def _format_entries(entries: List[Dict]) -> str:
+    """Entries as prompt text; callers size the list with _fit_newest or chunk_entries"""
+    return "\n\n".join([
         f"Entry {i+1}:\n{entry['content']}"
-        for i, entry in enumerate(entries_list)
+        for i, entry in enumerate(entries)
     ])
 
-    # Truncate if too long
-    if len(entries_text) > 15000:
-        entries_text = entries_text[:15000] + "\n\n[... additional entries truncated]"
 
-    print(f"\n{'='*60}")
-    print(f"DEBUG: Analyzing {len(entries_list)} journal entries")
-    print(f"DEBUG: Total text length: {len(entries_text)} chars")
-    print(f"DEBUG: First entry preview: {entries_list[0]['content'][:100]}...")
-    print(f"{'='*60}\n")
+def _prompt_chars(entries: List[Dict]) -> int:
+    return sum(len(entry["content"]) + ENTRY_OVERHEAD_CHARS for entry in entries)
 
-    # Generate analysis using Gemini
-    model = genai.GenerativeModel('gemini-2.5-flash')
 
-    # Build prompt - replace {{entries}} placeholder
-    prompt = ANALYSIS_PROMPT.replace("{{entries}}", entries_text)
+def _fit_newest(entries: List[Dict]) -> List[Dict]:
+    """
+    The newest whole entries (oldest first) that fit in DIGITAL_SELF_MAX_CHARS
 
-    print(f"DEBUG: Prompt length: {len(prompt)} chars")
-    print(f"DEBUG: Sending to Gemini...\n")
+    Older entries are dropped rather than cut mid-entry; only a single entry
+    larger than the whole budget is clipped.
+    """
+    kept, used = [], 0
+    for entry in reversed(entries):
+        size = len(entry["content"]) + ENTRY_OVERHEAD_CHARS
+        if kept and used + size > settings.digital_self_max_chars:
+            break
+        kept.append(entry)
+        used += size
+    if used > settings.digital_self_max_chars:
+        kept = [{**kept[0], "content": kept[0]["content"][:settings.digital_self_max_chars]}]
+    return list(reversed(kept))
+
+
+def _previous_analysis(insight: Dict) -> Dict:
+    """A stored insight (get_latest_digital_self_insight) in the analysis format"""
+    return {
+        "coreValues": insight["values"],
+        "emotionalPatterns": insight["patterns"],
+        "identityThemes": insight["themes"],
+        "tensions": insight["tensions"],
+        "keywords": insight["keywords"],
+    }
 
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.types.GenerationConfig(
-            temperature=0.7,
-            max_output_tokens=4096,  # Increased to allow full response
-        )
-    )
 
-    # Parse JSON response
+def _parse_analysis(response) -> Dict:
+    """The analysis JSON in a Gemini response"""
     try:
         # Clean response text (remove markdown code blocks if present)
         response_text = response.text.strip()
@@ -134,18 +227,6 @@ async def analyze_journal_entries(user_id: str) -> Dict:
 
         analysis = json.loads(response_text)
 
-        # Validate required fields
-        required_fields = ["coreValues", "emotionalPatterns", "identityThemes", "tensions", "keywords"]
-        for field in required_fields:
-            if field not in analysis:
-                raise ValueError(f"Missing required field: {field}")
-
-        # Add metadata
-        analysis["journalEntriesAnalyzed"] = len(entries_list)
-
-        print(f"✅ Successfully parsed analysis with {len(entries_list)} entries")
-        return analysis
-
     except json.JSONDecodeError as e:
         print(f"\n{'!'*60}")
         print(f"ERROR: Failed to parse LLM response as JSON")
@@ -153,174 +234,319 @@ async def analyze_journal_entries(user_id: str) -> Dict:
         print(f"ERROR: Full response text:")
         print(f"{response.text}")
         print(f"{'!'*60}\n")
-        raise Exception(f"LLM returned invalid JSON: {str(e)}")
+        raise LLMError(f"LLM returned invalid JSON: {str(e)}")
+    except ValueError as e:
+        # response.text raises when the response has no text (e.g. blocked)
+        raise LLMError(f"LLM returned no usable text: {str(e)}")
 
+    # Validate required fields
+    required_fields = ["coreValues", "emotionalPatterns", "identityThemes", "tensions", "keywords"]
+    for field in required_fields:
+        if field not in analysis:
+            raise LLMError(f"Missing required field: {field}")
+    return analysis
 
-async def save_digital_self_insights(user_id: str, analysis: Dict) -> str:
+
+async def _generate_analysis(prompt: str, temperature: float = 0.7, max_output_tokens: int = 4096) -> Dict:
+    print(f"DEBUG: Prompt length: {len(prompt)} chars")
+    print(f"DEBUG: Sending to Gemini...\n")
+
+    response = await generate_content(
+        prompt,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,  # Increased to allow full response
+        timeout=settings.digital_self_llm_timeout_seconds,
+    )
+    return _parse_analysis(response)
+
+
+async def _reduce_analyses(partials: List[Dict]) -> Dict:
     """
-    Save digital self insights to database
+    Merge per-chunk analyses with one more model call, which groups
+    paraphrased items; support counts come from the ids in each group
+    """
+    items_text, sources = number_items(partials)
+    try:
+        reduced = await _generate_analysis(
+            REDUCE_PROMPT
+            .replace("{{count}}", str(len(partials)))
+            .replace("{{items}}", items_text),
+            temperature=0.2,
+            max_output_tokens=8192,  # Id lists grow with the chunk count
+        )
+        return resolve_reduced(reduced, sources, len(partials))
+    except Exception as e:
+        # The partials are already paid for; merge them locally instead
+        print(f"[DIGITAL_SELF] Reduce call failed, merging {len(partials)} partial analyses locally: {e}")
+        return merge_analyses(partials)
 
-    Returns:
-        insight_id (UUID)
+
+async def _map_reduce_analysis(entries: List[Dict]) -> Tuple[Dict, List[Dict]]:
     """
+    Analyze the whole history: each token-budgeted chunk separately and
+    concurrently (map), then merge the partial analyses (reduce)
 
-    # Create main insight record
-    insight_result = supabase.table("digital_self_insights").insert({
-        "user_id": user_id,
-        "journal_entries_analyzed": analysis.get("journalEntriesAnalyzed", 0)
-    }).execute()
-
-    insight_id = insight_result.data[0]["id"]
-
-    # Save core values
-    values_data = [
-        {
-            "insight_id": insight_id,
-            "user_id": user_id,
-            "value_name": value,
-            "confidence_score": 0.8
-        }
-        for value in analysis.get("coreValues", [])
-    ]
-    if values_data:
-        supabase.table("digital_self_values").insert(values_data).execute()
-
-    # Save emotional patterns
-    patterns_data = [
-        {
-            "insight_id": insight_id,
-            "user_id": user_id,
-            "pattern_text": pattern,
-            "category": "emotional"
-        }
-        for pattern in analysis.get("emotionalPatterns", [])
-    ]
-    if patterns_data:
-        supabase.table("digital_self_patterns").insert(patterns_data).execute()
-
-    # Save identity themes
-    themes_data = []
-    for theme in analysis.get("identityThemes", []):
-        if isinstance(theme, dict):
-            themes_data.append({
-                "insight_id": insight_id,
-                "user_id": user_id,
-                "theme_name": theme.get("name", ""),
-                "description": theme.get("description", "")
-            })
+    Returns (analysis, entries of the chunks that were analyzed, oldest first).
+    """
+    chunks = chunk_entries(entries, settings.digital_self_chunk_tokens)
+    if len(chunks) == 1:
+        return await _generate_analysis(ANALYSIS_PROMPT.replace("{{entries}}", _format_entries(chunks[0]))), chunks[0]
+
+    print(f"DEBUG: Map-reduce over {len(chunks)} chunks")
+
+    async def analyze_chunk(chunk: List[Dict]) -> Dict:
+        async with _map_semaphore:
+            return await _generate_analysis(ANALYSIS_PROMPT.replace("{{entries}}", _format_entries(chunk)))
+
+    results = await asyncio.gather(*(analyze_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+    # A failed chunk loses its share of the history, not the whole analysis
+    partials, analyzed = [], []
+    for i, (chunk, result) in enumerate(zip(chunks, results)):
+        if isinstance(result, Exception):
+            print(f"[DIGITAL_SELF] Chunk {i + 1}/{len(chunks)} failed: {result}")
         else:
-            # Handle if LLM returns just strings
-            themes_data.append({
-                "insight_id": insight_id,
-                "user_id": user_id,
-                "theme_name": str(theme),
-                "description": ""
-            })
-    if themes_data:
-        supabase.table("digital_self_themes").insert(themes_data).execute()
-
-    # Save tensions
-    tensions_data = [
-        {
-            "insight_id": insight_id,
-            "user_id": user_id,
-            "tension_description": tension
-        }
-        for tension in analysis.get("tensions", [])
-    ]
-    if tensions_data:
-        supabase.table("digital_self_tensions").insert(tensions_data).execute()
-
-    # Save keywords
-    keywords_data = [
-        {
-            "insight_id": insight_id,
-            "user_id": user_id,
-            "keyword": keyword,
-            "frequency": 1
-        }
-        for keyword in analysis.get("keywords", [])
+            partials.append(result)
+            analyzed.extend(chunk)
+    if not partials:
+        failure = LLMError if all(is_llm_error(result) for result in results) else Exception
+        raise failure(f"All {len(chunks)} analysis chunks failed")
+
+    return await _reduce_analyses(partials), analyzed
+
+
+async def _cluster_analysis(user_id: str) -> Optional[Tuple[Dict, int, str]]:
+    """
+    Analyze a constant-size sample of the whole history: embeddings are
+    clustered locally and only the most typical entries of each cluster,
+    with the cluster sizes, go to the model
+
+    Returns (analysis, entries covered, created_at of the newest one), or None
+    if nothing is embedded yet.
+    """
+    rows = await load_user_entries(user_id, f"id, created_at, {EMBEDDING_SELECT}", active_only=True, embedded_only=True)
+    parsed = [(row, parse_embedding(row["embedding"])) for row in rows]
+    parsed = [(row, vector) for row, vector in parsed if vector is not None and vector.shape[-1] == EMBEDDING_DIMENSIONS]
+    if not parsed:
+        return None
+
+    rows = [row for row, _ in parsed]
+    matrix = normalize_rows(np.stack([vector for _, vector in parsed]))
+    labels, centroids = kmeans(matrix, settings.digital_self_clusters)
+    clusters = representatives(matrix, labels, centroids, settings.digital_self_cluster_representatives)
+
+    # Only the representatives' text is fetched
+    ids = [rows[i]["id"] for _, chosen in clusters for i in chosen]
+    result = await run_query(supabase.table("journal_entries").select("id, content").in_("id", ids))
+    contents = {row["id"]: row["content"] for row in result.data or []}
+
+    # Clip each entry so the prompt stays within DIGITAL_SELF_MAX_CHARS however long the history is
+    per_entry_chars = max(200, settings.digital_self_max_chars // max(len(ids), 1))
+    sections = [
+        f"These are representative entries from all {len(rows)} of this person's journal entries, "
+        f"grouped into {len(clusters)} recurring themes by similarity. A theme's share of the journal "
+        f"shows how central it is to them."
     ]
-    if keywords_data:
-        supabase.table("digital_self_keywords").insert(keywords_data).execute()
+    for number, (members, chosen) in enumerate(clusters, start=1):
+        first, last = rows[members.min()]["created_at"][:10], rows[members.max()]["created_at"][:10]
+        lines = [f"Theme {number} ({len(members)} entries, {len(members) / len(rows):.0%} of the journal, {first} to {last}):"]
+        for i in chosen:
+            content = contents.get(rows[i]["id"], "")
+            lines.append(f"Entry ({rows[i]['created_at'][:10]}):\n{content[:per_entry_chars]}")
+        sections.append("\n\n".join(lines))
 
-    return insight_id
+    print(f"DEBUG: {len(rows)} embedded entries in {len(clusters)} clusters, {len(ids)} representatives")
+    analysis = await _generate_analysis(ANALYSIS_PROMPT.replace("{{entries}}", "\n\n---\n\n".join(sections)))
+    return analysis, len(rows), rows[-1]["created_at"]
 
 
-async def get_digital_self_insights(user_id: str) -> Dict:
+async def _full_analysis(user_id: str) -> Tuple[Dict, int, str]:
     """
-    Retrieve the latest digital self insights for a user
+    Analyze the history from scratch per DIGITAL_SELF_STRATEGY
+
+    Returns (analysis, entries analyzed, created_at of the newest one).
+    """
+    if settings.digital_self_strategy == "clusters":
+        clustered = await _cluster_analysis(user_id)
+        if clustered:
+            return clustered
+        # Nothing embedded yet (e.g. before the backfill has run)
+        entries_list = await load_user_entries(user_id, "content, created_at", active_only=True)
+    elif settings.digital_self_strategy == "mapreduce":
+        entries_list = await load_user_entries(user_id, "content, created_at", active_only=True)
+    else:
+        entries_list = _fit_newest(await _fetch_recent_entries(user_id))
+    if not entries_list:
+        raise Exception("No journal entries found for analysis")
+
+    print(f"\n{'='*60}")
+    print(f"DEBUG: Analyzing {len(entries_list)} journal entries (full)")
+    print(f"DEBUG: First entry preview: {entries_list[0]['content'][:100]}...")
+    print(f"{'='*60}\n")
+
+    if settings.digital_self_strategy in ("clusters", "mapreduce"):
+        analysis, analyzed = await _map_reduce_analysis(entries_list)
+    else:
+        analysis = await _generate_analysis(ANALYSIS_PROMPT.replace("{{entries}}", _format_entries(entries_list)))
+        analyzed = entries_list
+    return analysis, len(analyzed), analyzed[-1]["created_at"]
+
+
+async def analyze_journal_entries(user_id: str, previous: Optional[Dict] = None) -> Dict:
+    """
+    Analyze journal entries for a user and extract digital self insights
+
+    With a previous insight (as returned by get_latest_digital_self_insight),
+    only entries created since its analysis_date are read and the model
+    updates that insight instead of starting over; if there are more new
+    entries than fit in one prompt, the history is re-analyzed in full.
+    Otherwise the whole history is analyzed per DIGITAL_SELF_STRATEGY:
+    "clusters" (representative entries of each embedding cluster),
+    "mapreduce" (every entry, in chunks) or "recent" (only the most recent
+    entries). Entries superseded by a near-duplicate are skipped in every
+    mode, so each journaling session counts once.
+
+    analysisDate is the created_at of the newest entry the model saw, so the
+    next incremental update starts exactly where this one stopped.
 
     Returns:
         Dict with coreValues, emotionalPatterns, identityThemes, tensions, keywords
+        and "mode" ("incremental" or "full"). In incremental mode with no new
+        entries, the previous insight unchanged with "unchanged": True.
     """
 
-    # Get latest insight record
-    insight_result = supabase.table("digital_self_insights")\
-        .select("*")\
-        .eq("user_id", user_id)\
-        .order("updated_at", desc=True)\
-        .limit(1)\
-        .execute()
+    if previous:
+        entries_list = await _fetch_new_entries(user_id, since=previous["analysis_date"])
+        if not entries_list:
+            return {
+                **_previous_analysis(previous),
+                "journalEntriesAnalyzed": previous["journal_entries_analyzed"],
+                "newEntriesAnalyzed": 0,
+                "mode": "incremental",
+                "unchanged": True,
+            }
+
+        if len(entries_list) <= settings.digital_self_max_entries and _prompt_chars(entries_list) <= settings.digital_self_max_chars:
+            print(f"\n{'='*60}")
+            print(f"DEBUG: Analyzing {len(entries_list)} journal entries (incremental)")
+            print(f"DEBUG: First entry preview: {entries_list[0]['content'][:100]}...")
+            print(f"{'='*60}\n")
+
+            analysis = await _generate_analysis(
+                UPDATE_PROMPT
+                .replace("{{previous}}", json.dumps(_previous_analysis(previous), indent=2))
+                .replace("{{entries}}", _format_entries(entries_list))
+            )
+            analysis["newEntriesAnalyzed"] = len(entries_list)
+            analysis["journalEntriesAnalyzed"] = len(entries_list) + previous["journal_entries_analyzed"]
+            analysis["analysisDate"] = entries_list[-1]["created_at"]
+            analysis["mode"] = "incremental"
+            print(f"✅ Successfully parsed analysis with {len(entries_list)} entries")
+            return analysis
+
+        # Too much new writing for one update prompt: start over rather than drop any of it
+        print(f"[DIGITAL_SELF] New entries exceed the incremental limits; running a full analysis")
+
+    analysis, analyzed, newest = await _full_analysis(user_id)
+    analysis["newEntriesAnalyzed"] = analyzed
+    analysis["journalEntriesAnalyzed"] = analyzed
+    analysis["analysisDate"] = newest
+    analysis["mode"] = "full"
+
+    print(f"✅ Successfully parsed analysis with {analyzed} entries")
+    return analysis
 
-    if not insight_result.data:
-        return None
 
-    insight_id = insight_result.data[0]["id"]
+async def save_digital_self_insights(user_id: str, analysis: Dict) -> str:
+    """
+    Save digital self insights to database
 
-    # Fetch all related data
-    values = supabase.table("digital_self_values")\
-        .select("value_name")\
-        .eq("insight_id", insight_id)\
-        .execute()
+    The insight and all of its child rows are written by one SQL function in
+    a single transaction, so readers never see a partial snapshot.
 
-    patterns = supabase.table("digital_self_patterns")\
-        .select("pattern_text")\
-        .eq("insight_id", insight_id)\
-        .execute()
+    Returns:
+        insight_id (UUID)
+    """
 
-    themes = supabase.table("digital_self_themes")\
-        .select("theme_name, description")\
-        .eq("insight_id", insight_id)\
-        .execute()
+    result = await run_query(
+        supabase.rpc("save_digital_self_insight", {"target_user_id": user_id, "analysis": analysis})
+    )
+    if not result.data:
+        raise Exception("Failed to save digital self insights")
 
-    tensions = supabase.table("digital_self_tensions")\
-        .select("tension_description")\
-        .eq("insight_id", insight_id)\
-        .execute()
+    return result.data
 
-    keywords = supabase.table("digital_self_keywords")\
-        .select("keyword")\
-        .eq("insight_id", insight_id)\
-        .execute()
+
+async def _latest_insight(user_id: str) -> Optional[Dict]:
+    """Latest insight with all of its child rows, in one round trip"""
+    result = await run_query(
+        supabase.rpc("get_latest_digital_self_insight", {"target_user_id": user_id})
+    )
+    return result.data or None
+
+
+async def get_digital_self_insights(user_id: str) -> Dict:
+    """
+    Retrieve the latest digital self insights for a user
+
+    Returns:
+        Dict with coreValues, emotionalPatterns, identityThemes, tensions, keywords
+    """
+
+    insight = await _latest_insight(user_id)
+    if not insight:
+        return None
 
     # Format response
     return {
-        "coreValues": [v["value_name"] for v in values.data],
-        "emotionalPatterns": [p["pattern_text"] for p in patterns.data],
-        "identityThemes": [t["theme_name"] for t in themes.data],
-        "tensions": [t["tension_description"] for t in tensions.data],
-        "keywords": [k["keyword"] for k in keywords.data],
-        "analysisDate": insight_result.data[0]["analysis_date"],
-        "journalEntriesAnalyzed": insight_result.data[0]["journal_entries_analyzed"]
+        "coreValues": insight["values"],
+        "emotionalPatterns": insight["patterns"],
+        "identityThemes": [theme["name"] for theme in insight["themes"]],
+        "tensions": insight["tensions"],
+        "keywords": insight["keywords"],
+        "analysisDate": insight["analysis_date"],
+        "journalEntriesAnalyzed": insight["journal_entries_analyzed"]
     }
 
 
-async def regenerate_digital_self(user_id: str) -> Dict:
+async def regenerate_digital_self(
+    user_id: str,
+    mode: str = "incremental",
+    progress: Optional[ProgressCallback] = None
+) -> Dict:
     """
     Regenerate digital self insights by analyzing journal entries
 
+    mode "incremental" updates the latest insight with entries written since
+    it (falling back to a full analysis when there is none, or when the new
+    entries don't fit in one prompt); "full" analyzes from scratch per
+    DIGITAL_SELF_STRATEGY: "clusters" sends representative entries of each
+    embedding cluster, "mapreduce" every entry in chunks, and "recent" only
+    the most recent entries.
+
     Returns:
         Dict with insights
     """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode {mode!r}; expected one of {ANALYSIS_MODES}")
+
+    async def report(stage: str, fraction: float) -> None:
+        if progress:
+            await progress(stage, fraction)
+
+    await report("loading", 0.05)
+    previous = await _latest_insight(user_id) if mode == "incremental" else None
 
     # Analyze journal entries
-    analysis = await analyze_journal_entries(user_id)
+    await report("analyzing", 0.1)
+    analysis = await analyze_journal_entries(user_id, previous=previous)
 
-    # Delete old insights for this user (optional - or keep history)
-    # For now, we'll keep old insights and just create new ones
+    # Nothing new to analyze: keep the current insight
+    if analysis.pop("unchanged", False):
+        return {**analysis, "insightId": previous["id"]}
 
-    # Save new insights
+    # Old insights are kept as history; the newest one is what gets read
+    await report("saving", 0.9)
     insight_id = await save_digital_self_insights(user_id, analysis)
 
     # Return the analysis
@@ -328,3 +554,38 @@ async def regenerate_digital_self(user_id: str) -> Dict:
         **analysis,
         "insightId": insight_id
     }
+
+
+async def _run_regeneration_job(user_id: str, params: Dict, progress: ProgressCallback) -> Dict:
+    """Job handler: regenerate and summarize the result for clients"""
+    insights = await regenerate_digital_self(user_id, mode=params.get("mode", "incremental"), progress=progress)
+
+    new_entries = insights.get("newEntriesAnalyzed", 0)
+    return {
+        "mode": insights.get("mode"),
+        "message": (
+            f"Analyzed {new_entries} journal entries" if new_entries
+            else "No new journal entries since the last analysis"
+        ),
+        "insights": {
+            "coreValues": insights.get("coreValues", []),
+            "emotionalPatterns": insights.get("emotionalPatterns", []),
+            "identityThemes": insights.get("identityThemes", []),
+            "tensions": insights.get("tensions", []),
+            "keywords": insights.get("keywords", []),
+            "analysisDate": insights.get("analysisDate"),
+            "journalEntriesAnalyzed": insights.get("journalEntriesAnalyzed", 0)
+        }
+    }
+
+
+# Regeneration runs in the background; started and stopped with the app
+regeneration_queue = JobQueue(
+    kind="digital_self_regenerate",
+    handler=_run_regeneration_job,
+    store=create_job_store(settings.job_store_backend, settings.job_retention_seconds, settings.job_stale_seconds),
+    workers=settings.job_workers,
+    max_attempts=settings.job_max_attempts,
+    retryable=is_llm_error,
+    retry_base_seconds=settings.job_retry_base_seconds
+)
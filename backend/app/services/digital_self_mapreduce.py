@@ -0,0 +1,222 @@
+"""
+Digital Self Map-Reduce
+Splits a whole journal into token-budgeted chunks and merges the per-chunk
+analyses back into one digital self insight.
+
+Each chunk is analyzed independently (map). Every item of the partial
+analyses is then numbered and one more model call groups the items that mean
+the same thing, paraphrases included (reduce). Support is counted locally
+from the ids in each group, i.e. how many chunks surfaced the item, so the
+ranking and confidences don't depend on the model's arithmetic.
+
+merge_analyses is the local fallback for when the reduce call fails:
+case-insensitive matches for values, themes and keywords, MinHash
+similarity for patterns and tensions.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from app.services.dedup import minhash_signature
+from app.services.llm import LLMError
+
+CHARS_PER_TOKEN = 4  # Rough Gemini average for English prose
+SENTENCE_SIMILARITY_THRESHOLD = 0.5  # Estimated Jaccard above which two sentences count as one
+
+# Items kept per field in the merged insight (same limits the prompt asks for)
+FIELD_LIMITS = {
+    "coreValues": 5,
+    "emotionalPatterns": 4,
+    "identityThemes": 4,
+    "tensions": 3,
+    "keywords": 5,
+}
+
+# Item ids in the reduce prompt are a field prefix and a number, e.g. "v12"
+FIELD_PREFIXES = {
+    "coreValues": "v",
+    "emotionalPatterns": "p",
+    "identityThemes": "i",
+    "tensions": "t",
+    "keywords": "k",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_entries(entries: List[Dict], max_tokens: int) -> List[List[Dict]]:
+    """
+    Consecutive runs of entries whose content fits in max_tokens each
+
+    Entries keep their order. An entry larger than the budget gets a chunk of
+    its own, with its content clipped to fit.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks, current, current_tokens = [], [], 0
+    for entry in entries:
+        content = entry.get("content") or ""
+        if len(content) > max_chars:
+            entry = {**entry, "content": content[:max_chars]}
+        tokens = estimate_tokens(entry["content"])
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(entry)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class _Tally:
+    """Occurrence counts of deduplicated items across partial analyses"""
+
+    def __init__(self, fuzzy: bool = False):
+        self.fuzzy = fuzzy
+        self.items: List[Dict] = []
+        self._by_key: Dict[str, Dict] = {}
+
+    def _match(self, key: str, signature: Optional[np.ndarray]) -> Optional[Dict]:
+        if key in self._by_key:
+            return self._by_key[key]
+        if self.fuzzy and signature is not None:
+            for item in self.items:
+                if item["signature"] is not None and (item["signature"] == signature).mean() >= SENTENCE_SIMILARITY_THRESHOLD:
+                    return item
+        return None
+
+    def add(self, text: str, position: int, payload: Optional[Dict] = None) -> None:
+        key = " ".join(text.lower().split())
+        if not key:
+            return
+        signature = minhash_signature(text) if self.fuzzy else None
+        item = self._match(key, signature)
+        if item is None:
+            item = {"text": text.strip(), "payload": payload, "signature": signature, "count": 0, "chunks": set(), "last_seen": position}
+            self.items.append(item)
+            self._by_key[key] = item
+        # Count each chunk once, however often it repeats the item
+        if position not in item["chunks"]:
+            item["chunks"].add(position)
+            item["count"] += 1
+        item["last_seen"] = max(item["last_seen"], position)
+        if payload and not item["payload"]:
+            item["payload"] = payload
+
+    def top(self, limit: int) -> List[Dict]:
+        return sorted(self.items, key=lambda item: (-item["count"], -item["last_seen"]))[:limit]
+
+
+def _theme_name(theme) -> Tuple[str, Dict]:
+    if isinstance(theme, dict):
+        name = str(theme.get("name", ""))
+        return name, {"name": name, "description": theme.get("description", "")}
+    return str(theme), {"name": str(theme), "description": ""}
+
+
+def merge_analyses(partials: List[Dict]) -> Dict:
+    """
+    Merge per-chunk analyses (oldest chunk first) into one
+
+    Besides the usual fields, the result carries "valueConfidence" (share of
+    chunks naming each value) and "keywordFrequencies" (number of chunks
+    naming each keyword), which are stored alongside the insight.
+    """
+    tallies = {
+        "coreValues": _Tally(),
+        "emotionalPatterns": _Tally(fuzzy=True),
+        "identityThemes": _Tally(),
+        "tensions": _Tally(fuzzy=True),
+        "keywords": _Tally(),
+    }
+    for position, partial in enumerate(partials):
+        for field, tally in tallies.items():
+            for item in partial.get(field) or []:
+                if field == "identityThemes":
+                    name, theme = _theme_name(item)
+                    tally.add(name, position, theme)
+                else:
+                    tally.add(str(item), position)
+
+    merged = {
+        field: [item["text"] for item in tally.top(FIELD_LIMITS[field])]
+        for field, tally in tallies.items()
+        if field != "identityThemes"
+    }
+    merged["identityThemes"] = [item["payload"] for item in tallies["identityThemes"].top(FIELD_LIMITS["identityThemes"])]
+    merged["valueConfidence"] = {
+        item["text"]: round(item["count"] / len(partials), 3)
+        for item in tallies["coreValues"].top(FIELD_LIMITS["coreValues"])
+    }
+    merged["keywordFrequencies"] = {
+        item["text"]: item["count"]
+        for item in tallies["keywords"].top(FIELD_LIMITS["keywords"])
+    }
+    return merged
+
+
+def number_items(partials: List[Dict]) -> Tuple[str, Dict[str, int]]:
+    """
+    Every item of the partial analyses (oldest chunk first) as reduce prompt text
+
+    Returns (text, chunk position of each item id).
+    """
+    sources, sections = {}, []
+    for field, prefix in FIELD_PREFIXES.items():
+        lines = [f"{field}:"]
+        for position, partial in enumerate(partials):
+            for item in partial.get(field) or []:
+                if field == "identityThemes":
+                    name, theme = _theme_name(item)
+                    text = f"{name} - {theme['description']}" if theme["description"] else name
+                else:
+                    text = str(item)
+                if not text.strip():
+                    continue
+                item_id = f"{prefix}{len(sources) + 1}"
+                sources[item_id] = position
+                lines.append(f"{item_id} (chunk {position + 1}): {' '.join(text.split())}")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections), sources
+
+
+def resolve_reduced(reduced: Dict, sources: Dict[str, int], partial_count: int) -> Dict:
+    """
+    The reduce call's merged items, ranked by how many chunks support them
+
+    Each merged item lists the ids it groups; ids from another field or not in
+    the prompt are ignored. Equal support keeps the model's order.
+
+    Raises LLMError when the response has the wrong shape, or when no merged
+    item of a field cites a valid id although the partials had items for it,
+    so a bad reduce response falls back to merge_analyses instead of wiping
+    a section.
+    """
+    supported = {}
+    for field, prefix in FIELD_PREFIXES.items():
+        groups = reduced.get(field) or []
+        if not isinstance(groups, list) or not all(isinstance(item, dict) for item in groups):
+            raise LLMError(f"Reduce response has malformed {field}")
+        items = []
+        for item in groups:
+            text = str(item.get("name" if field == "identityThemes" else "text") or "").strip()
+            if not text:
+                continue
+            chunks = {
+                sources[item_id] for item_id in item.get("ids") or []
+                if isinstance(item_id, str) and item_id.startswith(prefix) and item_id in sources
+            }
+            value = {"name": text, "description": item.get("description", "")} if field == "identityThemes" else text
+            items.append((len(chunks), value))
+        if not any(support for support, _ in items) and any(item_id.startswith(prefix) for item_id in sources):
+            raise LLMError(f"Reduce response dropped every {field} item")
+        items.sort(key=lambda item: -item[0])
+        supported[field] = items[:FIELD_LIMITS[field]]
+
+    merged = {field: [value for _, value in items] for field, items in supported.items()}
+    merged["valueConfidence"] = {
+        value: round(support / partial_count, 3) for support, value in supported["coreValues"]
+    }
+    merged["keywordFrequencies"] = {value: support for support, value in supported["keywords"]}
+    return merged
@@ -0,0 +1,228 @@
+"""
+Embedding Backfill Worker
+Re-embeds journal entries that were stored without a vector (e.g. after a
+quota error) so they become visible to match_journal_entries again. Long
+entries also get their chunk rows, the same way ingest_journal stores them.
+
+Run once from the backend directory:
+    python -m app.services.embedding_backfill --batch-size 50 --max-per-minute 600
+
+Or enable EMBEDDING_BACKFILL_ENABLED to run it periodically in-process.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from app.config import get_settings
+from app.database import get_db, run_query
+from app.services.rag import (
+    EMBEDDING_COLUMN,
+    dedup_index,
+    entry_chunks,
+    generate_embeddings,
+    retrieval_cache,
+    store_entry_chunks,
+    vector_index
+)
+from typing import Dict, List, Optional
+
+settings = get_settings()
+supabase = get_db()
+
+
+class RateLimiter:
+    """Spaces out work so at most max_per_minute items are embedded per minute"""
+
+    def __init__(self, max_per_minute: int):
+        self.seconds_per_item = 60.0 / max_per_minute if max_per_minute > 0 else 0.0
+        self._next_allowed = time.monotonic()
+
+    async def acquire(self, items: int) -> None:
+        now = time.monotonic()
+        if self._next_allowed > now:
+            await asyncio.sleep(self._next_allowed - now)
+        self._next_allowed = max(now, self._next_allowed) + items * self.seconds_per_item
+
+
+def load_checkpoint(path: str) -> Dict:
+    """Load the backfill cursor, or start from the beginning"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"last_created_at": None, "last_id": None, "processed": 0, "failed": 0}
+
+
+def save_checkpoint(path: str, checkpoint: Dict) -> None:
+    """Atomically persist the backfill cursor"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+async def fetch_unembedded_page(checkpoint: Dict, page_size: int, user_id: Optional[str] = None) -> List[Dict]:
+    """Keyset-paginate entries with no embedding, ordered by (created_at, id)"""
+    query = supabase.table("journal_entries")\
+        .select("id, user_id, content, created_at")\
+        .is_(EMBEDDING_COLUMN, "null")
+
+    if user_id:
+        query = query.eq("user_id", user_id)
+
+    if checkpoint.get("last_created_at"):
+        last_created_at = checkpoint["last_created_at"]
+        last_id = checkpoint["last_id"]
+        query = query.or_(
+            f'created_at.gt."{last_created_at}",'
+            f'and(created_at.eq."{last_created_at}",id.gt.{last_id})'
+        )
+
+    result = await run_query(query.order("created_at").order("id").limit(page_size))
+    return result.data or []
+
+
+async def backfill_embeddings(
+    batch_size: int = None,
+    max_per_minute: int = None,
+    checkpoint_path: str = None,
+    user_id: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Dict:
+    """
+    Run one resumable pass over entries stored without embeddings
+
+    Returns:
+        Dict with processed/failed counts and throughput for this pass
+    """
+    batch_size = batch_size or settings.embedding_backfill_batch_size
+    max_per_minute = max_per_minute or settings.embedding_backfill_max_per_minute
+    checkpoint_path = checkpoint_path or settings.embedding_backfill_checkpoint_path
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    limiter = RateLimiter(max_per_minute)
+    started = time.monotonic()
+    processed = 0
+    failed = 0
+
+    print(f"[BACKFILL] Starting pass (cursor: {checkpoint.get('last_created_at') or 'beginning'})")
+
+    while limit is None or processed + failed < limit:
+        page_size = batch_size if limit is None else min(batch_size, limit - processed - failed)
+        rows = await fetch_unembedded_page(checkpoint, page_size, user_id)
+        if not rows:
+            break
+
+        # Long entries get chunk rows too, exactly as at ingest
+        chunks = [entry_chunks(row["content"]) for row in rows]
+        texts = [row["content"] for row in rows] + [chunk for row_chunks in chunks for chunk in row_chunks]
+        await limiter.acquire(len(texts))
+
+        try:
+            vectors = await generate_embeddings(texts)
+            embeddings, chunk_vectors = vectors[:len(rows)], vectors[len(rows):]
+            chunk_embeddings = []
+            for row_chunks in chunks:
+                chunk_embeddings.append(chunk_vectors[:len(row_chunks)])
+                chunk_vectors = chunk_vectors[len(row_chunks):]
+
+            # Chunks first: a failed chunk write leaves the entry whole-entry searchable
+            await asyncio.gather(*[
+                store_entry_chunks(row["user_id"], row["id"], row_chunks, row_chunk_embeddings)
+                for row, row_chunks, row_chunk_embeddings in zip(rows, chunks, chunk_embeddings)
+                if row_chunks
+            ])
+            updates = await asyncio.gather(*[
+                run_query(supabase.table("journal_entries").update({EMBEDDING_COLUMN: embedding}).eq("id", row["id"]))
+                for row, embedding in zip(rows, embeddings)
+            ], return_exceptions=True)
+            page_failed = sum(1 for update in updates if isinstance(update, Exception))
+
+            # Newly embedded rows change these users' search results
+            for row_user_id in {row["user_id"] for row in rows}:
+                retrieval_cache.bump(row_user_id)
+                vector_index.invalidate(row_user_id)
+                dedup_index.invalidate(row_user_id)
+        except Exception as e:
+            # Leave the rows NULL; the next full pass retries them
+            print(f"[BACKFILL] Batch of {len(rows)} failed: {str(e)}")
+            page_failed = len(rows)
+
+        processed += len(rows) - page_failed
+        failed += page_failed
+
+        checkpoint["last_created_at"] = rows[-1]["created_at"]
+        checkpoint["last_id"] = rows[-1]["id"]
+        checkpoint["processed"] = checkpoint.get("processed", 0) + len(rows) - page_failed
+        checkpoint["failed"] = checkpoint.get("failed", 0) + page_failed
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        elapsed = time.monotonic() - started
+        print(f"[BACKFILL] {processed} embedded, {failed} failed, {processed / elapsed:.1f} entries/s")
+
+        if len(rows) < page_size:
+            break
+    else:
+        # Stopped by --limit: keep the cursor so the next run resumes here
+        return _summary(processed, failed, started, completed=False)
+
+    # Reached the end: rewind the cursor so rows that failed this pass get retried
+    checkpoint["last_created_at"] = None
+    checkpoint["last_id"] = None
+    save_checkpoint(checkpoint_path, checkpoint)
+    return _summary(processed, failed, started, completed=True)
+
+
+def _summary(processed: int, failed: int, started: float, completed: bool) -> Dict:
+    elapsed = time.monotonic() - started
+    summary = {
+        "processed": processed,
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 2),
+        "entries_per_second": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+        "completed": completed,
+    }
+    print(f"[BACKFILL] Pass finished: {summary}")
+    return summary
+
+
+async def run_backfill_forever(interval_seconds: float = None) -> None:
+    """Background task: run a backfill pass, then sleep, until cancelled"""
+    interval_seconds = interval_seconds or settings.embedding_backfill_interval_seconds
+    while True:
+        try:
+            await backfill_embeddings()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[BACKFILL ERROR] {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill missing journal entry embeddings")
+    parser.add_argument("--batch-size", type=int, default=None, help="Entries per page / batch embedding call")
+    parser.add_argument("--max-per-minute", type=int, default=None, help="Embedding rate limit")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file path")
+    parser.add_argument("--user-id", default=None, help="Only backfill one user's entries")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many entries")
+    parser.add_argument("--reset", action="store_true", help="Ignore the saved cursor and start over")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or settings.embedding_backfill_checkpoint_path
+    if args.reset and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    asyncio.run(backfill_embeddings(
+        batch_size=args.batch_size,
+        max_per_minute=args.max_per_minute,
+        checkpoint_path=checkpoint_path,
+        user_id=args.user_id,
+        limit=args.limit,
+    ))
+
+
+if __name__ == "__main__":
+    main()
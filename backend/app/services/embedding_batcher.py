@@ -0,0 +1,83 @@
+"""
+Embedding Batcher
+Coalesces concurrent embedding requests into single batch embedding calls
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+EmbedBatchFn = Callable[[List[str], str], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """
+    Collects embed() calls for up to max_wait_ms (or until max_batch_size
+    requests are queued) and sends them as one batch call per task_type,
+    fanning the resulting vectors back out to the awaiting callers.
+    """
+
+    def __init__(self, embed_batch: EmbedBatchFn, max_batch_size: int = 32, max_wait_ms: float = 10):
+        self._embed_batch = embed_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.requests_batched = 0
+
+    async def embed(self, text: str, task_type: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        queue = self._pending.setdefault(task_type, [])
+        queue.append((text, future))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(task_type)
+        elif task_type not in self._timers:
+            self._timers[task_type] = loop.call_later(self.max_wait_seconds, self._flush, task_type)
+
+        return await future
+
+    def _flush(self, task_type: str) -> None:
+        timer = self._timers.pop(task_type, None)
+        if timer:
+            timer.cancel()
+
+        batch = self._pending.pop(task_type, [])
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._send(task_type, batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, task_type: str, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Identical texts in the same window are embedded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            embeddings = await self._embed_batch(unique_texts, task_type)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.requests_batched += len(batch)
+
+        by_text = dict(zip(unique_texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "batches_sent": self.batches_sent,
+            "requests_batched": self.requests_batched,
+            "pending": sum(len(queue) for queue in self._pending.values()),
+        }
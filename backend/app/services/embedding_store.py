@@ -0,0 +1,122 @@
+"""
+Embedding Store
+Persistent SQLite store of embeddings keyed by a hash of (model, task_type, text)
+
+Sits behind the in-process EmbeddingCache so duplicate content (client
+retries, repeated reflections, backfills) never costs a second Gemini call,
+even across restarts. The store is capped at max_entries; once it grows past
+the cap the least recently used rows are deleted and the file is vacuumed.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from app.services.embedding_cache import normalize_text
+from typing import Dict, Iterable, List
+
+COMPACT_SLACK = 0.1  # Let the store overshoot by 10% before compacting
+
+
+class EmbeddingStore:
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings(last_used)")
+        self._conn.commit()
+
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.compactions = 0
+
+    @staticmethod
+    def make_key(model: str, task_type: str, text: str) -> str:
+        payload = "\x1f".join((model, task_type, normalize_text(text)))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                    [time.time()] + [key for key, _ in rows]
+                )
+                self._conn.commit()
+
+        self.hits += len(rows)
+        self.misses += len(keys) - len(rows)
+        return {key: np.frombuffer(vector, dtype=np.float32).tolist() for key, vector in rows}
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, created_at, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now, now)
+                    for key, vector in items.items()
+                ]
+            )
+            self._conn.commit()
+            self._count += self._conn.total_changes - before
+
+            if self._count > self.max_entries * (1 + COMPACT_SLACK):
+                self._compact()
+
+    def _compact(self) -> None:
+        """Drop least recently used rows down to max_entries and reclaim space"""
+        excess = self._count - self.max_entries
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._conn.commit()
+        self._conn.execute("VACUUM")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.compactions += 1
+        print(f"[EMBEDDING STORE] Compacted to {self._count} entries")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self._count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "compactions": self.compactions,
+        }
@@ -0,0 +1,281 @@
+"""
+Job Queue
+In-process background jobs with a pluggable store for their state
+
+Long-running work (digital self regeneration) is submitted as a job and
+runs on a small pool of worker tasks; the HTTP request returns the job id
+immediately and clients poll or stream its status. At most one job per
+(kind, user) is active at a time: submitting again returns the active job.
+A failure the queue's retryable check accepts (e.g. an LLM timeout) is
+retried with exponential backoff; any other failure fails the job at once.
+
+Workers only run jobs submitted to their own process. The store is what
+other processes see: "memory" keeps state in this process; "supabase"
+writes it to the background_jobs table (supabase_background_jobs.sql) so
+status survives restarts and is readable from every API worker.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.database import get_db, run_query
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Reports (stage, fraction complete or None)
+ProgressCallback = Callable[[str, Optional[float]], Awaitable[None]]
+# Runs one job: (user_id, params, progress) -> JSON-serializable result
+JobHandler = Callable[[str, Dict, ProgressCallback], Awaitable[Dict]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class InMemoryJobStore:
+    """Job state in this process only; finished jobs are kept for retention_seconds"""
+
+    def __init__(self, retention_seconds: float, stale_seconds: float):
+        self.retention_seconds = retention_seconds
+        self.stale_seconds = stale_seconds
+        self._jobs: Dict[str, Dict] = {}
+
+    async def insert(self, job: Dict) -> None:
+        self._prune()
+        self._jobs[job["id"]] = dict(job)
+
+    async def update(self, job_id: str, fields: Dict) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        return dict(job)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def find_active(self, kind: str, user_id: str) -> Optional[Dict]:
+        cutoff = (_now() - timedelta(seconds=self.stale_seconds)).isoformat()
+        for job in self._jobs.values():
+            if job["kind"] == kind and job["user_id"] == user_id and job["status"] in ACTIVE_STATUSES and job["updated_at"] > cutoff:
+                return dict(job)
+        return None
+
+    def _prune(self) -> None:
+        cutoff = (_now() - timedelta(seconds=self.retention_seconds)).isoformat()
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED_STATUSES and job["updated_at"] < cutoff
+        ]:
+            del self._jobs[job_id]
+
+
+class SupabaseJobStore:
+    """Job state in the background_jobs table, shared by every API worker"""
+
+    TABLE = "background_jobs"
+
+    def __init__(self, stale_seconds: float):
+        self.stale_seconds = stale_seconds
+        self.db = get_db()
+
+    async def insert(self, job: Dict) -> None:
+        await run_query(self.db.table(self.TABLE).insert(job))
+
+    async def update(self, job_id: str, fields: Dict) -> Optional[Dict]:
+        result = await run_query(self.db.table(self.TABLE).update(fields).eq("id", job_id))
+        return result.data[0] if result.data else None
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        result = await run_query(self.db.table(self.TABLE).select("*").eq("id", job_id).limit(1))
+        return result.data[0] if result.data else None
+
+    async def find_active(self, kind: str, user_id: str) -> Optional[Dict]:
+        # Jobs whose process died stop counting as active once they go stale
+        cutoff = (_now() - timedelta(seconds=self.stale_seconds)).isoformat()
+        result = await run_query(
+            self.db.table(self.TABLE)
+            .select("*")
+            .eq("kind", kind)
+            .eq("user_id", user_id)
+            .in_("status", list(ACTIVE_STATUSES))
+            .gt("updated_at", cutoff)
+            .order("created_at", desc=True)
+            .limit(1)
+        )
+        return result.data[0] if result.data else None
+
+
+def create_job_store(backend: str, retention_seconds: float, stale_seconds: float):
+    if backend == "memory":
+        return InMemoryJobStore(retention_seconds, stale_seconds)
+    if backend == "supabase":
+        return SupabaseJobStore(stale_seconds)
+    raise ValueError(f"Unknown job store backend {backend!r}; expected 'memory' or 'supabase'")
+
+
+class JobQueue:
+    def __init__(
+        self,
+        kind: str,
+        handler: JobHandler,
+        store,
+        workers: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retryable: Optional[Callable[[Exception], bool]] = None
+    ):
+        self.kind = kind
+        self._handler = handler
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._retryable = retryable or (lambda error: False)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries: set = set()
+        self._submit_lock = asyncio.Lock()
+        self._changed: Dict[str, Set[asyncio.Event]] = {}  # One event per waiter
+        self.retried = 0
+
+    def start(self) -> None:
+        """Start the worker pool (app startup)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel workers and pending retries; unfinished jobs go stale in the store"""
+        tasks = self._tasks + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks, self._retries = [], set()
+
+    async def submit(self, user_id: str, params: Optional[Dict] = None) -> Tuple[Dict, bool]:
+        """
+        Enqueue a job for the user unless one is already active
+
+        Returns (job, created); created is False when the active job is returned.
+        """
+        if self._queue is None:
+            raise Exception("Job queue is not running")
+
+        async with self._submit_lock:
+            existing = await self.store.find_active(self.kind, user_id)
+            if existing:
+                return existing, False
+
+            now = _now().isoformat()
+            job = {
+                "id": str(uuid.uuid4()),
+                "kind": self.kind,
+                "user_id": user_id,
+                "status": "queued",
+                "stage": "queued",
+                "progress": 0.0,
+                "attempts": 0,
+                "params": params or {},
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            await self.store.insert(job)
+
+        self._queue.put_nowait(job)
+        return job, True
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.store.get(job_id)
+
+    async def find_active(self, user_id: str) -> Optional[Dict]:
+        return await self.store.find_active(self.kind, user_id)
+
+    async def wait_for_change(self, job_id: str, timeout: float) -> bool:
+        """Wait until this process updates the job (True) or timeout passes (False)"""
+        event = asyncio.Event()
+        self._changed.setdefault(job_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self._changed.get(job_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._changed[job_id]
+
+    async def _update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = _now().isoformat()
+        await self.store.update(job_id, fields)
+        for event in self._changed.pop(job_id, ()):
+            event.set()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Store errors must not take the worker down
+                print(f"[JOBS] {self.kind} job {job['id']} could not be recorded: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict) -> None:
+        job_id = job["id"]
+        attempts = job["attempts"] + 1
+        await self._update(job_id, status="running", stage="starting", progress=0.0, attempts=attempts)
+
+        async def progress(stage: str, fraction: Optional[float] = None) -> None:
+            fields = {"stage": stage}
+            if fraction is not None:
+                fields["progress"] = fraction
+            await self._update(job_id, **fields)
+
+        try:
+            result = await self._handler(job["user_id"], job["params"], progress)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if not self._retryable(e):
+                print(f"[JOBS] {self.kind} job {job_id} failed: {error}")
+                await self._update(job_id, status="failed", stage="failed", error=error)
+            elif attempts < self.max_attempts:
+                delay = self.retry_base_seconds * 2 ** (attempts - 1)
+                print(f"[JOBS] {self.kind} job {job_id} attempt {attempts} failed, retrying in {delay:.0f}s: {error}")
+                await self._update(job_id, status="queued", stage="retrying", error=error)
+                self.retried += 1
+                retry = asyncio.create_task(self._requeue_later({**job, "attempts": attempts}, delay))
+                self._retries.add(retry)
+                retry.add_done_callback(self._retries.discard)
+            else:
+                print(f"[JOBS] {self.kind} job {job_id} failed after {attempts} attempts: {error}")
+                await self._update(job_id, status="failed", stage="failed", error=error)
+            return
+
+        await self._update(job_id, status="succeeded", stage="done", progress=1.0, result=result, error=None)
+
+    async def _requeue_later(self, job: Dict, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(job)
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "retry_pending": len(self._retries),
+            "retried": self.retried,
+        }
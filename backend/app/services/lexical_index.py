@@ -0,0 +1,174 @@
+"""
+Lexical Index Service
+Incrementally maintained per-user BM25 inverted index over journal content.
+
+Serves as the retrieval fallback when the embedding API is unavailable and
+as the lexical half of hybrid search (fused with vector results using
+reciprocal-rank fusion).
+"""
+
+import math
+import re
+import numpy as np
+from typing import Dict, List, Optional
+from app.services.user_index_cache import UserIndexCache
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been being but by can could
+did do does doing for from had has have having he her him his how i i'm if in
+into is it it's its just me my myself no not now of on or our out over really
+she so some than that the their them then there these they this to too up us
+very was we were what when where which while who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class UserLexicalIndex:
+    """BM25 over one user's journal entries"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.entries: List[Dict] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {doc index: term frequency}
+        self.total_length = 0
+        self.removed: set = set()  # Doc indexes of superseded entries
+        self.content_bytes = 0
+
+    def add(self, entry: Dict) -> None:
+        doc_index = len(self.entries)
+        tokens = tokenize(entry["content"])
+
+        self.entries.append(entry)
+        self.content_bytes += len(entry["content"])
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+        for token in tokens:
+            postings = self.postings.setdefault(token, {})
+            postings[doc_index] = postings.get(doc_index, 0) + 1
+
+    def remove(self, entry_id: str) -> None:
+        """Hide an entry from results; its postings are dropped on the next reload"""
+        for doc_index, entry in enumerate(self.entries):
+            if entry["id"] == entry_id and doc_index not in self.removed:
+                self.removed.add(doc_index)
+                self.total_length -= self.doc_lengths[doc_index]
+
+    @property
+    def nbytes(self) -> int:
+        return self.content_bytes * 2
+
+    def search(self, query: str, top_k: int, snippet_length: int) -> List[Dict]:
+        """Top-k entries by BM25 score, then recent entries to fill any gap"""
+        doc_count = len(self.entries)
+        matched = []
+
+        terms = set(tokenize(query))
+        if doc_count and terms:
+            scores = np.zeros(doc_count, dtype=np.float32)
+            doc_lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+            avg_length = max(self.total_length / doc_count, 1.0)
+
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                docs = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+                tfs = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * doc_lengths[docs] / avg_length)
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+            if self.removed:
+                scores[list(self.removed)] = 0.0
+
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            candidates = candidates[np.argsort(-scores[candidates])]
+            matched = [
+                self._record(self.entries[i], "lexical", snippet_length, float(scores[i]))
+                for i in candidates
+            ]
+
+        if len(matched) >= top_k:
+            return matched
+
+        matched_ids = {record["id"] for record in matched}
+        matched_ids.update(self.entries[i]["id"] for i in self.removed)
+        recent = sorted(
+            (entry for entry in self.entries if entry["id"] not in matched_ids),
+            key=lambda entry: entry["created_at"],
+            reverse=True
+        )[:top_k - len(matched)]
+        return matched + [self._record(entry, "recent", snippet_length) for entry in recent]
+
+    @staticmethod
+    def _record(entry: Dict, match_type: str, snippet_length: int, score: Optional[float] = None) -> Dict:
+        return {
+            "id": entry["id"],
+            "content": entry["content"][:snippet_length],
+            "similarity": None,
+            "lexical_score": score,
+            "created_at": entry["created_at"],
+            "match_type": match_type,
+            "chunk_index": None,
+            "source": entry.get("source"),
+        }
+
+
+class LexicalIndexCache(UserIndexCache):
+    """LRU of per-user lexical indexes bounded by a memory budget"""
+
+    def _build(self, user_id: str, rows: List[Dict]) -> UserLexicalIndex:
+        index = UserLexicalIndex()
+        for row in rows:
+            index.add({"id": row["id"], "content": row["content"], "created_at": row["created_at"], "source": row.get("source")})
+        return index
+
+    def add_entry(self, user_id: str, entry: Dict) -> None:
+        """Write-through on ingest; unloaded users pick the row up on first load"""
+        index = self.loaded(user_id)
+        if index is None:
+            return
+        index.add({"id": entry["id"], "content": entry["content"], "created_at": entry["created_at"], "source": entry.get("source")})
+        self.updated(user_id)
+
+    def stats(self) -> Dict:
+        return {
+            **super().stats(),
+            "documents": sum(len(index.entries) for index in self._indexes.values()),
+        }
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], top_k: int, k: int = 60) -> List[Dict]:
+    """
+    Merge ranked record lists by summing 1 / (k + rank) per entry id
+
+    Entries found by more than one retriever are marked match_type 'hybrid'.
+    """
+    fused: Dict[str, Dict] = {}
+    scores: Dict[str, float] = {}
+
+    for records in result_lists:
+        for rank, record in enumerate(records, 1):
+            entry_id = record["id"]
+            scores[entry_id] = scores.get(entry_id, 0.0) + 1.0 / (k + rank)
+            if entry_id in fused:
+                merged = fused[entry_id]
+                merged["match_type"] = "hybrid"
+                for key, value in record.items():
+                    if merged.get(key) is None:
+                        merged[key] = value
+            else:
+                fused[entry_id] = dict(record)
+
+    ranked = sorted(fused, key=lambda entry_id: scores[entry_id], reverse=True)[:top_k]
+    return [{**fused[entry_id], "fusion_score": scores[entry_id]} for entry_id in ranked]
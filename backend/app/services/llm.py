@@ -0,0 +1,55 @@
+"""
+LLM Service
+Shared async Gemini client used by every router, agent and service
+"""
+
+import asyncio
+import google.generativeai as genai
+from google.api_core.exceptions import GoogleAPIError
+from app.config import get_settings
+from typing import Optional
+
+settings = get_settings()
+genai.configure(api_key=settings.google_api_key)
+
+# Bounds how many Gemini generations are in flight per worker so a burst of
+# users queues here instead of exhausting quota or sockets
+_generation_semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+
+
+class LLMError(Exception):
+    """A response that could not be used (blocked, invalid JSON, missing fields)"""
+
+
+def is_llm_error(error: BaseException) -> bool:
+    """Whether a failure came from the model call itself, so trying again may succeed"""
+    return isinstance(error, (LLMError, GoogleAPIError, asyncio.TimeoutError))
+
+
+async def generate_content(
+    prompt: str,
+    temperature: float = 0.7,
+    max_output_tokens: int = 1024,
+    top_p: Optional[float] = None,
+    model_name: Optional[str] = None,
+    timeout: Optional[float] = None,
+):
+    """
+    Generate a Gemini response without blocking the event loop
+
+    Returns the raw response so callers can inspect candidates/finish_reason
+    exactly as they did with the synchronous client. timeout defaults to
+    LLM_TIMEOUT_SECONDS; long generations pass their own.
+    """
+    model = genai.GenerativeModel(model_name or settings.llm_model)
+    generation_config = genai.types.GenerationConfig(
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        top_p=top_p,
+    )
+
+    async with _generation_semaphore:
+        return await asyncio.wait_for(
+            model.generate_content_async(prompt, generation_config=generation_config),
+            timeout=timeout or settings.llm_timeout_seconds,
+        )
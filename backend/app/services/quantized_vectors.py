@@ -0,0 +1,103 @@
+"""
+Quantized Vectors
+Compact growable matrix of embeddings for in-process similarity search
+
+Rows are stored as int8 (per-vector scale, ~4x smaller than float32) or
+float16 (~2x smaller). Scoring runs in two stages:
+
+1. approximate: the query is quantized the same way and dotted with the
+   stored codes directly, block by block, so no float32 copy of the whole
+   matrix is ever materialized;
+2. rescore (optional): the best candidates are re-scored with the float32
+   query against their dequantized rows, removing the query-side error.
+
+Full-precision rows are deliberately not kept; that would cancel the saving.
+"""
+
+import numpy as np
+from typing import Optional
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+INT8_MAX = 127.0
+BLOCK_ROWS = 8192  # Rows converted to float32 at a time while scoring
+
+
+class QuantizedMatrix:
+    def __init__(self, dimensions: int, dtype: str = "int8", initial_capacity: int = 64):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype {dtype!r}; expected one of {SUPPORTED_DTYPES}")
+        self.dimensions = dimensions
+        self.dtype = np.dtype(dtype)
+        self.codes = np.zeros((initial_capacity, dimensions), dtype=self.dtype)
+        self.scales = np.ones(initial_capacity, dtype=np.float32)
+        self.size = 0
+
+    @property
+    def exact(self) -> bool:
+        return self.dtype == np.float32
+
+    def _quantize(self, vectors: np.ndarray):
+        """(codes, scales) for a 1-D vector or a 2-D batch"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dtype != np.int8:
+            return vectors.astype(self.dtype), np.ones(vectors.shape[:-1], dtype=np.float32)
+        peak = np.abs(vectors).max(axis=-1)
+        scales = np.where(peak > 0, peak / INT8_MAX, 1.0).astype(np.float32)
+        codes = np.rint(vectors / np.expand_dims(scales, -1)).astype(np.int8)
+        return codes, scales
+
+    def append(self, vector: np.ndarray) -> None:
+        if self.size == self.codes.shape[0]:
+            capacity = max(self.codes.shape[0] * 2, 1)
+            codes = np.zeros((capacity, self.dimensions), dtype=self.dtype)
+            codes[:self.size] = self.codes[:self.size]
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[:self.size] = self.scales[:self.size]
+            self.codes, self.scales = codes, scales
+
+        self.codes[self.size], self.scales[self.size] = self._quantize(vector)
+        self.size += 1
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Compact in place, keeping rows where mask is True"""
+        kept = int(mask.sum())
+        self.codes[:kept] = self.codes[:self.size][mask]
+        self.scales[:kept] = self.scales[:self.size][mask]
+        self.size = kept
+
+    def dequantize(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        codes = self.codes[:self.size] if rows is None else self.codes[rows]
+        scales = self.scales[:self.size] if rows is None else self.scales[rows]
+        return codes.astype(np.float32) * scales[:, None]
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Dot products of every row with the query, computed on the stored codes"""
+        query = np.asarray(query, dtype=np.float32)
+        if self.exact:
+            return self.codes[:self.size] @ query
+
+        query_codes, query_scale = self._quantize(query)
+        query_codes = query_codes.astype(np.float32)
+        scores = np.empty(self.size, dtype=np.float32)
+        for start in range(0, self.size, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, self.size)
+            scores[start:stop] = self.codes[start:stop].astype(np.float32) @ query_codes
+        return scores * self.scales[:self.size] * query_scale
+
+    def rescore(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Dot products of the given rows with the float32 query"""
+        return self.dequantize(rows) @ np.asarray(query, dtype=np.float32)
+
+    def scores(self, query: np.ndarray, rescore_top: int = 0) -> np.ndarray:
+        """Approximate scores, with the top rescore_top rows re-scored precisely"""
+        scores = self.approximate_scores(query)
+        if self.exact or rescore_top <= 0 or not self.size:
+            return scores
+        top = min(rescore_top, self.size)
+        rows = np.argpartition(-scores, top - 1)[:top]
+        scores[rows] = self.rescore(query, rows)
+        return scores
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.dtype == np.int8 else 0)
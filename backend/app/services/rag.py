@@ -1,91 +1,598 @@
+import asyncio
 import google.generativeai as genai
 from app.config import get_settings
-from app.database import get_supabase
-from typing import List, Dict
+from app.database import get_db, run_query
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_store import EmbeddingStore
+from app.services.vector_index import VectorIndexCache
+from app.services.lexical_index import LexicalIndexCache, reciprocal_rank_fusion
+from app.services.chunking import split_into_chunks
+from app.services.dedup import DuplicateIndexCache, mmr_rerank
+from app.services.retrieval_cache import RetrievalCache
+from app.services.ranking import rank_records
+from typing import List, Dict, Optional, Tuple
 
 settings = get_settings()
 genai.configure(api_key=settings.google_api_key)
-supabase = get_supabase()
+supabase = get_db()
 
-def generate_embedding(text: str) -> List[float]:
-    """Generate embedding vector for text using Gemini"""
+EMBEDDING_MODEL = "models/text-embedding-004"  # Latest Gemini embedding model
+FULL_EMBEDDING_DIMENSIONS = 768
+
+# Reduced output sizes are truncations of the full vector, stored in their
+# own column (embedding_256, ...) and searched by a matching RPC
+EMBEDDING_DIMENSIONS = settings.embedding_dimensions
+if EMBEDDING_DIMENSIONS == FULL_EMBEDDING_DIMENSIONS:
+    EMBEDDING_COLUMN = "embedding"
+    SEARCH_RPC = "search_journal_entries"
+else:
+    EMBEDDING_COLUMN = f"embedding_{EMBEDDING_DIMENSIONS}"
+    SEARCH_RPC = f"search_journal_entries_{EMBEDDING_DIMENSIONS}"
+EMBEDDING_SELECT = f"embedding:{EMBEDDING_COLUMN}"  # PostgREST alias keeps rows keyed "embedding"
+
+# Cached vectors of different sizes must never be mixed up
+EMBEDDING_CACHE_MODEL = f"{EMBEDDING_MODEL}@{EMBEDDING_DIMENSIONS}"
+MAX_EMBEDDING_BATCH_SIZE = 100  # Gemini batchEmbedContents limit
+LOAD_PAGE_SIZE = 1000  # PostgREST default max rows per request
+
+# Bounds in-flight embedding calls so ingest bursts don't exhaust quota
+_embedding_semaphore = asyncio.Semaphore(settings.embedding_max_concurrency)
+
+# Repeated and constant queries (e.g. meditation context) skip Gemini entirely
+embedding_cache = EmbeddingCache(
+    max_entries=settings.embedding_cache_max_entries,
+    ttl_seconds=settings.embedding_cache_ttl_seconds
+)
+
+# Duplicate content is served from disk across restarts
+embedding_store = EmbeddingStore(
+    settings.embedding_store_path,
+    max_entries=settings.embedding_store_max_entries
+) if settings.embedding_store_enabled else None
+
+async def _store_get(keys: List[str]) -> Dict[str, List[float]]:
+    """Look up persisted embeddings; store problems never fail a request"""
+    if embedding_store is None or not keys:
+        return {}
+    try:
+        return await asyncio.to_thread(embedding_store.get_many, keys)
+    except Exception as e:
+        print(f"Embedding store read failed: {str(e)}")
+        return {}
+
+async def _store_put(items: Dict[str, List[float]]) -> None:
+    if embedding_store is None or not items:
+        return
     try:
-        # Use Gemini embedding model
-        result = genai.embed_content(
-            model="models/text-embedding-004",  # Latest Gemini embedding model
-            content=text,
-            task_type="retrieval_document"
+        await asyncio.to_thread(embedding_store.put_many, items)
+    except Exception as e:
+        print(f"Embedding store write failed: {str(e)}")
+
+async def _embed_batch(texts: List[str], task_type: str) -> List[List[float]]:
+    """Embed several texts with a single Gemini batch call"""
+    async with _embedding_semaphore:
+        result = await genai.embed_content_async(
+            model=EMBEDDING_MODEL,
+            content=texts,
+            task_type=task_type,
+            output_dimensionality=EMBEDDING_DIMENSIONS
         )
-        return result['embedding']
+    return result['embedding']
+
+async def load_user_entries(
+    user_id: str,
+    columns: str = "id, content, created_at",
+    table: str = "journal_entries",
+    active_only: bool = False,
+    embedded_only: bool = False
+) -> List[Dict]:
+    """Fetch every journal row for a user, oldest first, in pages"""
+    rows = []
+    while True:
+        query = supabase.table(table).select(columns).eq("user_id", user_id)
+        if active_only:
+            # Skip entries superseded by a near-duplicate
+            query = query.is_("superseded_by", "null")
+        if embedded_only:
+            query = query.not_.is_(EMBEDDING_COLUMN, "null")
+        result = await run_query(
+            query
+            .order("created_at")
+            .range(len(rows), len(rows) + LOAD_PAGE_SIZE - 1)
+        )
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < LOAD_PAGE_SIZE:
+            return rows
+
+async def _load_vector_rows(user_id: str) -> List[Dict]:
+    """Entries with their embeddings, each carrying its chunk rows (if any)"""
+    entries, chunks = await asyncio.gather(
+        load_user_entries(user_id, f"id, content, created_at, source, {EMBEDDING_SELECT}", active_only=True),
+        load_user_entries(user_id, f"entry_id, chunk_index, content, {EMBEDDING_SELECT}", table="journal_entry_chunks")
+    )
+    chunks_by_entry = {}
+    for chunk in chunks:
+        chunks_by_entry.setdefault(chunk["entry_id"], []).append(chunk)
+    for entry in entries:
+        entry["chunks"] = sorted(chunks_by_entry.get(entry["id"], []), key=lambda chunk: chunk["chunk_index"])
+    return entries
+
+async def _load_lexical_rows(user_id: str) -> List[Dict]:
+    return await load_user_entries(user_id, "id, content, created_at, source", active_only=True)
+
+async def _load_recent_rows(user_id: str) -> List[Dict]:
+    """The user's most recent active entries, newest first, for duplicate checks"""
+    result = await run_query(
+        supabase.table("journal_entries")
+        .select(f"id, content, created_at, {EMBEDDING_SELECT}")
+        .eq("user_id", user_id)
+        .is_("superseded_by", "null")
+        .order("created_at", desc=True)
+        .limit(settings.dedup_window)
+    )
+    return result.data or []
+
+# Per-user in-memory vector indexes searched before the pgvector RPC
+vector_index = VectorIndexCache(
+    _load_vector_rows,
+    memory_budget_bytes=int(settings.vector_index_memory_mb * 1024 * 1024),
+    ttl_seconds=settings.vector_index_ttl_seconds,
+    dimensions=EMBEDDING_DIMENSIONS,
+    dtype=settings.vector_index_dtype,
+    rescore=settings.vector_index_rescore
+)
+
+# Per-user BM25 indexes for lexical fallback and hybrid search
+lexical_index = LexicalIndexCache(
+    _load_lexical_rows,
+    memory_budget_bytes=int(settings.lexical_index_memory_mb * 1024 * 1024),
+    ttl_seconds=settings.lexical_index_ttl_seconds
+)
+
+# Per-user MinHash signatures and embeddings of recent entries
+dedup_index = DuplicateIndexCache(
+    _load_recent_rows,
+    window=settings.dedup_window,
+    memory_budget_bytes=int(settings.dedup_index_memory_mb * 1024 * 1024),
+    ttl_seconds=settings.dedup_index_ttl_seconds,
+    dimensions=EMBEDDING_DIMENSIONS,
+    dtype=settings.vector_index_dtype
+)
+
+# Search results between a user's writes, versioned by a per-user generation
+retrieval_cache = RetrievalCache(
+    max_entries=settings.retrieval_cache_max_entries,
+    ttl_seconds=settings.retrieval_cache_ttl_seconds
+)
+
+# Concurrent single-text requests are coalesced into one batch call
+embedding_batcher = EmbeddingBatcher(
+    _embed_batch,
+    max_batch_size=min(settings.embedding_batch_max_size, MAX_EMBEDDING_BATCH_SIZE),
+    max_wait_ms=settings.embedding_batch_max_wait_ms
+)
+
+async def generate_embedding(text: str, task_type: str = "retrieval_document") -> List[float]:
+    """Generate embedding vector for text using Gemini"""
+    cache_key = EmbeddingCache.make_key(EMBEDDING_CACHE_MODEL, task_type, text)
+    cached = embedding_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    store_key = EmbeddingStore.make_key(EMBEDDING_CACHE_MODEL, task_type, text)
+    stored = (await _store_get([store_key])).get(store_key)
+    if stored is not None:
+        embedding_cache.set(cache_key, stored)
+        return stored
+
+    try:
+        embedding = await embedding_batcher.embed(text, task_type)
+        embedding_cache.set(cache_key, embedding)
+        await _store_put({store_key: embedding})
+        return embedding
     except Exception as e:
         print(f"Embedding error: {str(e)}")
         raise Exception(f"Failed to generate embedding: {str(e)}")
 
-async def ingest_journal(user_id: str, content: str) -> Dict:
-    """Ingest a journal entry with vector embedding (or without if quota exceeded)"""
+async def generate_embeddings(texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+    """Generate embeddings for many texts, sending cache misses as batch calls"""
+    keys = [EmbeddingCache.make_key(EMBEDDING_CACHE_MODEL, task_type, text) for text in texts]
+    embeddings = [embedding_cache.get(key) for key in keys]
+    missing = {}
+    for key, text, embedding in zip(keys, texts, embeddings):
+        if embedding is None:
+            missing.setdefault(key, text)
+
+    # Persistent store next, then Gemini for whatever is left
+    store_keys = {key: EmbeddingStore.make_key(EMBEDDING_CACHE_MODEL, task_type, text) for key, text in missing.items()}
+    stored = await _store_get(list(store_keys.values()))
+    fetched = {}
+    for key, store_key in store_keys.items():
+        if store_key in stored:
+            embedding_cache.set(key, stored[store_key])
+            fetched[key] = stored[store_key]
+    missing_keys = [key for key in missing if key not in fetched]
+
+    try:
+        for start in range(0, len(missing_keys), MAX_EMBEDDING_BATCH_SIZE):
+            chunk = missing_keys[start:start + MAX_EMBEDDING_BATCH_SIZE]
+            results = await _embed_batch([missing[key] for key in chunk], task_type)
+            for key, embedding in zip(chunk, results):
+                embedding_cache.set(key, embedding)
+                fetched[key] = embedding
+            await _store_put({store_keys[key]: fetched[key] for key in chunk})
+    except Exception as e:
+        print(f"Batch embedding error: {str(e)}")
+        raise Exception(f"Failed to generate embeddings: {str(e)}")
+
+    return [
+        embedding if embedding is not None else fetched[key]
+        for key, embedding in zip(keys, embeddings)
+    ]
+
+def entry_chunks(content: str) -> List[str]:
+    """Passages a long entry is embedded as, besides the whole entry (none for short entries)"""
+    if len(content) > settings.rag_chunk_threshold_chars:
+        return split_into_chunks(content, settings.rag_chunk_size_chars)
+    return []
+
+async def store_entry_chunks(
+    user_id: str,
+    entry_id: str,
+    chunks: List[str],
+    chunk_embeddings: List[List[float]]
+) -> List[Dict]:
+    """
+    Write an entry's chunk rows (replacing any earlier ones at the same index)
+
+    Returns the stored chunks, or [] if the write failed; the entry then stays
+    searchable by its whole-entry embedding.
+    """
+    stored_chunks = [
+        {
+            "entry_id": entry_id,
+            "user_id": user_id,
+            "chunk_index": i,
+            "content": chunk,
+            "embedding": chunk_embedding
+        }
+        for i, (chunk, chunk_embedding) in enumerate(zip(chunks, chunk_embeddings))
+    ]
+    if not stored_chunks:
+        return []
+    try:
+        await run_query(supabase.table("journal_entry_chunks").upsert([
+            {**{key: value for key, value in chunk.items() if key != "embedding"},
+             EMBEDDING_COLUMN: chunk["embedding"]}
+            for chunk in stored_chunks
+        ], on_conflict="entry_id,chunk_index"))
+    except Exception as chunk_error:
+        print(f"Storing chunks failed, entry stays whole-entry searchable: {str(chunk_error)}")
+        return []
+    return stored_chunks
+
+async def ingest_journal(
+    user_id: str,
+    content: str,
+    embedding: Optional[List[float]] = None,
+    source: str = "entry"
+) -> Dict:
+    """
+    Ingest a journal entry with vector embedding (or without if quota exceeded)
+
+    source is "entry" (raw journal entry), "synthesized" (entry woven together
+    with follow-up answers) or "meditation"; ranking weighs them differently.
+    """
     try:
-        # Try to generate embedding
+        # Long entries are also embedded passage by passage
+        chunks = entry_chunks(content)
+        chunk_embeddings = []
+
+        # Try to generate embedding unless the caller already has one
         try:
-            embedding = generate_embedding(content)
-            print(f"Generated embedding with {len(embedding)} dimensions")
+            if chunks:
+                # Whole entry (if needed) and every chunk in one batch call
+                texts = chunks if embedding is not None else [content] + chunks
+                vectors = await generate_embeddings(texts)
+                if embedding is None:
+                    embedding = vectors[0]
+                    vectors = vectors[1:]
+                chunk_embeddings = vectors
+                print(f"Generated embeddings for entry and {len(chunks)} chunks")
+            elif embedding is None:
+                embedding = await generate_embedding(content)
+                print(f"Generated embedding with {len(embedding)} dimensions")
         except Exception as embed_error:
             print(f"Embedding failed (quota?), storing without embedding: {str(embed_error)}")
-            embedding = None
+
+        # Near-duplicates (raw vs synthesized entry, resubmits): the longer
+        # version stays searchable and the shorter one is superseded
+        duplicate = None
+        if settings.dedup_enabled:
+            try:
+                duplicate = await dedup_index.find(
+                    user_id,
+                    content,
+                    embedding,
+                    settings.dedup_minhash_threshold,
+                    settings.dedup_similarity_threshold
+                )
+            except Exception as dedup_error:
+                print(f"Duplicate check failed, storing as a new entry: {str(dedup_error)}")
+        superseded_by = duplicate["id"] if duplicate and len(content) < duplicate["length"] else None
+        supersedes = duplicate["id"] if duplicate and not superseded_by else None
 
         # Store in Supabase
-        result = supabase.table("journal_entries").insert({
+        row = {
             "user_id": user_id,
             "content": content,
-            "embedding": embedding
-        }).execute()
+            EMBEDDING_COLUMN: embedding,
+            "source": source
+        }
+        if superseded_by:
+            row["superseded_by"] = superseded_by
+        result = await run_query(supabase.table("journal_entries").insert(row))
+        entry_id = result.data[0]["id"]
+
+        if supersedes:
+            try:
+                await run_query(
+                    supabase.table("journal_entries")
+                    .update({"superseded_by": entry_id})
+                    .eq("id", supersedes)
+                )
+                dedup_index.remove_entry(user_id, supersedes)
+                vector_index.remove_entry(user_id, supersedes)
+                lexical_index.remove_entry(user_id, supersedes)
+            except Exception as supersede_error:
+                print(f"Superseding duplicate {supersedes} failed: {str(supersede_error)}")
+                supersedes = None
+        if duplicate:
+            print(
+                f"Near-duplicate of {duplicate['id']} (jaccard {duplicate['jaccard']:.2f}, "
+                f"similarity {duplicate['similarity']:.2f}); "
+                + ("superseded by it" if superseded_by else "superseding it")
+            )
+
+        # Chunks are only stored with vectors; an entry without them is
+        # searched by its whole-entry embedding instead
+        stored_chunks = await store_entry_chunks(user_id, entry_id, chunks, chunk_embeddings)
+
+        if not superseded_by:
+            dedup_index.add_entry(user_id, entry_id, content, embedding)
+            if settings.vector_index_enabled:
+                vector_index.add_entry(user_id, result.data[0], embedding, stored_chunks)
+            if settings.lexical_index_enabled:
+                lexical_index.add_entry(user_id, result.data[0])
 
         return {
             "id": result.data[0]["id"],
-            "message": "Journal entry ingested successfully" + (" (without embeddings)" if not embedding else "")
+            "message": "Journal entry ingested successfully" + (" (without embeddings)" if not embedding else ""),
+            "supersedes": supersedes,
+            "superseded_by": superseded_by
         }
     except Exception as e:
         print(f"Ingest error: {str(e)}")
         raise Exception(f"Failed to ingest journal entry: {str(e)}")
+    finally:
+        # Any write (even a partial one) makes cached results stale
+        retrieval_cache.bump(user_id)
 
-async def search_memories(user_id: str, query: str, top_k: int = 3) -> List[str]:
-    """Search user's journal entries using semantic similarity (or fallback to recent entries)"""
-    try:
-        # Try semantic search first
+async def _vector_search(
+    user_id: str,
+    query_embedding: Optional[List[float]],
+    top_k: int,
+    ef_search: Optional[int] = None
+) -> List[Dict]:
+    """Similarity search (in-process index first, then the RPC) with recency fill"""
+    if settings.vector_index_enabled:
         try:
-            # Use Gemini embeddings for query
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=query,
-                task_type="retrieval_query"
+            index = await vector_index.get(user_id)
+            return index.search(
+                query_embedding,
+                top_k,
+                settings.rag_match_threshold,
+                settings.rag_snippet_length
             )
-            query_embedding = result['embedding']
-
-            # Perform similarity search using the RPC function
-            search_result = supabase.rpc('match_journal_entries', {
-                'query_embedding': query_embedding,
-                'match_threshold': 0.7,
-                'match_count': top_k,
-                'user_id': user_id
-            }).execute()
-
-            if search_result.data:
-                return [entry['content'] for entry in search_result.data]
-        except Exception as embed_error:
-            print(f"Semantic search failed, falling back to recent entries: {str(embed_error)}")
+        except Exception as index_error:
+            print(f"Vector index search failed, using RPC: {str(index_error)}")
 
-        # Fallback: Just get recent journal entries
-        fallback_result = supabase.table("journal_entries").select("content").eq("user_id", user_id).order("created_at", desc=True).limit(top_k).execute()
+    params = {
+        'query_embedding': query_embedding,
+        'match_threshold': settings.rag_match_threshold,
+        'match_count': top_k,
+        'user_id': user_id,
+        'snippet_length': settings.rag_snippet_length
+    }
+    # HNSW candidate list size for this call (recall vs latency)
+    ef_search = ef_search or settings.rag_hnsw_ef_search
+    if ef_search:
+        params['ef_search'] = ef_search
+    search_result = await run_query(supabase.rpc(SEARCH_RPC, params))
+    return search_result.data or []
 
-        if fallback_result.data:
-            print(f"Returning {len(fallback_result.data)} recent entries as fallback")
-            return [entry['content'] for entry in fallback_result.data]
+async def _lexical_search(user_id: str, query: str, top_k: int) -> List[Dict]:
+    """BM25 search over the user's entries with recency fill"""
+    index = await lexical_index.get(user_id)
+    return index.search(query, top_k, settings.rag_snippet_length)
 
-        return []
+def _retrieval_key(user_id: str, query: str, top_k: int, mode: str, ef_search: Optional[int] = None):
+    return retrieval_cache.make_key(user_id, query, top_k, mode, ef_search)
+
+async def _search_records(
+    user_id: str,
+    query: str,
+    top_k: int,
+    query_embedding: Optional[List[float]],
+    mode: str,
+    ef_search: Optional[int] = None
+) -> Tuple[List[Dict], bool]:
+    """Uncached search; also says whether the result is safe to cache"""
+    result_count = top_k
+    if settings.rag_ranking_enabled or settings.rag_mmr_enabled:
+        top_k = top_k * settings.rag_candidate_multiplier
+
+    try:
+        # Use Gemini embeddings for query (unless the caller precomputed one)
+        degraded = False
+        if query_embedding is None and mode != "lexical":
+            try:
+                query_embedding = await generate_embedding(query, task_type="retrieval_query")
+            except Exception as embed_error:
+                print(f"Query embedding failed, falling back to lexical search: {str(embed_error)}")
+                degraded = True
+
+        if mode == "lexical" or (query_embedding is None and settings.lexical_index_enabled):
+            records = await _lexical_search(user_id, query, top_k)
+        elif mode == "hybrid" and settings.lexical_index_enabled:
+            vector_records, lexical_records = await asyncio.gather(
+                _vector_search(user_id, query_embedding, top_k, ef_search),
+                _lexical_search(user_id, query, top_k)
+            )
+            records = reciprocal_rank_fusion([
+                [record for record in vector_records if record['match_type'] == 'semantic'],
+                [record for record in lexical_records if record['match_type'] == 'lexical']
+            ], top_k)
+
+            # Fill remaining slots with recent entries from either retriever
+            seen = {record['id'] for record in records}
+            for record in vector_records + lexical_records:
+                if len(records) >= top_k:
+                    break
+                if record['match_type'] == 'recent' and record['id'] not in seen:
+                    records.append(record)
+                    seen.add(record['id'])
+        else:
+            # A NULL embedding makes the RPC return recent entries only
+            records = await _vector_search(user_id, query_embedding, top_k, ef_search)
+
+        # Rerank the wider candidate pool locally, then trim to top_k
+        if settings.rag_ranking_enabled:
+            records = rank_records(
+                records,
+                relevance_weight=settings.rag_relevance_weight,
+                recency_weight=settings.rag_recency_weight,
+                importance_weight=settings.rag_importance_weight,
+                half_life_days=settings.rag_recency_half_life_days
+            )
+        if settings.rag_mmr_enabled:
+            records = mmr_rerank(records, result_count, settings.rag_mmr_lambda)
+        records = records[:result_count]
+
+        fallback_count = sum(1 for record in records if record['match_type'] == 'recent')
+        if fallback_count:
+            print(f"Returning {fallback_count} recent entries as fallback")
+        return records, not degraded
 
     except Exception as e:
         # If everything fails, return empty list (graceful degradation)
         print(f"Search error: {str(e)}")
-        return []
+        return [], False
+
+async def search_memory_records(
+    user_id: str,
+    query: str,
+    top_k: int = 3,
+    query_embedding: Optional[List[float]] = None,
+    mode: Optional[str] = None,
+    ef_search: Optional[int] = None
+) -> List[Dict]:
+    """
+    Search user's journal entries
+
+    Returns up to top_k records (id, content snippet, similarity, created_at,
+    match_type). Relevant entries come first and the rest is topped up with
+    recent entries. mode is "vector", "lexical" or "hybrid" (vector and BM25
+    results merged with reciprocal-rank fusion); when the query can't be
+    embedded, vector mode degrades to lexical search. A wider candidate pool
+    is fetched and reranked locally: by similarity blended with recency and
+    importance (ranking), and with MMR so the results are distinct memories
+    rather than near-copies of one. ef_search overrides the HNSW candidate
+    list size used by the pgvector RPC.
+
+    Results are cached until the user's next ingest. Searches with a
+    caller-provided embedding (e.g. a document vector) bypass the cache.
+    """
+    mode = mode or settings.rag_search_mode
+    cacheable = settings.retrieval_cache_enabled and query_embedding is None
+
+    if cacheable:
+        key = _retrieval_key(user_id, query, top_k, mode, ef_search)
+        cached = retrieval_cache.get(key)
+        if cached is not None:
+            return cached
+
+    records, complete = await _search_records(user_id, query, top_k, query_embedding, mode, ef_search)
+    if cacheable and complete:
+        retrieval_cache.set(key, records)
+    return records
+
+async def search_memory_records_batch(searches: List[Dict]) -> List[List[Dict]]:
+    """
+    Run many searches at once
+
+    Each search is a dict with user_id, query, top_k, mode and ef_search. Cached
+    results are served first; query embeddings for the remaining non-lexical
+    searches are generated in one batch call, then those searches run
+    concurrently. Results come back in input order.
+    """
+    searches = [
+        {**search, "top_k": search.get("top_k", 3), "mode": search.get("mode") or settings.rag_search_mode}
+        for search in searches
+    ]
+    keys = [
+        _retrieval_key(search["user_id"], search["query"], search["top_k"], search["mode"], search.get("ef_search"))
+        for search in searches
+    ]
+    results: List[Optional[List[Dict]]] = [
+        retrieval_cache.get(key) if settings.retrieval_cache_enabled else None
+        for key in keys
+    ]
+    pending = [i for i, records in enumerate(results) if records is None]
+
+    embeddings: Dict[int, List[float]] = {}
+    to_embed = [i for i in pending if searches[i]["mode"] != "lexical"]
+    if to_embed:
+        try:
+            vectors = await generate_embeddings(
+                [searches[i]["query"] for i in to_embed],
+                task_type="retrieval_query"
+            )
+            embeddings = dict(zip(to_embed, vectors))
+        except Exception as embed_error:
+            # Each search then embeds (or falls back) on its own
+            print(f"Batch query embedding failed: {str(embed_error)}")
+
+    searched = await asyncio.gather(*(
+        _search_records(
+            searches[i]["user_id"],
+            searches[i]["query"],
+            searches[i]["top_k"],
+            embeddings.get(i),
+            searches[i]["mode"],
+            searches[i].get("ef_search")
+        )
+        for i in pending
+    ))
+    for i, (records, complete) in zip(pending, searched):
+        results[i] = records
+        if settings.retrieval_cache_enabled and complete:
+            retrieval_cache.set(keys[i], records)
+    return results
+
+async def search_memories(
+    user_id: str,
+    query: str,
+    top_k: int = 3,
+    query_embedding: Optional[List[float]] = None,
+    mode: Optional[str] = None,
+    ef_search: Optional[int] = None
+) -> List[str]:
+    """Search user's journal entries using semantic similarity (or fallback to recent entries)"""
+    records = await search_memory_records(user_id, query, top_k, query_embedding, mode, ef_search)
+    return [record['content'] for record in records]
 
 async def get_user_context(user_id: str, query: str) -> str:
     """Get relevant user context for a query"""
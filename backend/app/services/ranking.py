@@ -0,0 +1,126 @@
+"""
+Ranking Service
+Reranks a retrieved candidate pool by relevance, recency and importance
+
+Pure cosine similarity lets an old entry outrank last week's crisis. The
+search path fetches a wider candidate pool once and this stage scores it
+locally (no extra round trips):
+
+    score = w_relevance * relevance + w_recency * recency + w_importance * importance
+
+relevance is the retriever's score scaled to [0, 1], recency decays
+exponentially with the entry's age, and importance blends entry length,
+entry source (a synthesized session counts more than a raw entry) and
+emotional intensity.
+"""
+
+import math
+import re
+import numpy as np
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+# Synthesized sessions are the user's fullest account of an experience
+SOURCE_IMPORTANCE = {
+    "synthesized": 1.0,
+    "meditation": 0.6,
+    "entry": 0.5,
+}
+DEFAULT_SOURCE_IMPORTANCE = 0.5
+
+LENGTH_SATURATION_CHARS = 2000  # Entries this long get the full length score
+
+EMOTION_WORDS = frozenset("""
+afraid alone angry anxiety anxious ashamed betrayed broke broken burnout cried
+crisis cry crying depressed depression desperate devastated disappointed dread
+empty exhausted fear furious grateful grief guilt guilty happy heartbroken
+helpless hopeless hurt jealous joy lonely lost loved miserable nervous numb
+overwhelmed panic proud rage regret relieved sad scared shame stressed
+terrified thrilled trauma upset worried worthless
+""".split())
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _relevance(records: List[Dict]) -> np.ndarray:
+    """Retriever scores scaled to [0, 1]; recency fill-ins score zero"""
+    scores = np.zeros(len(records), dtype=np.float32)
+    for i, record in enumerate(records):
+        if record.get("match_type") == "recent":
+            continue
+        for key in ("fusion_score", "similarity", "lexical_score"):
+            if record.get(key) is not None:
+                scores[i] = record[key]
+                break
+
+    # Cosine similarities are already on a 0-1 scale; BM25 and fusion scores are not
+    if any(record.get("fusion_score") is not None or record.get("lexical_score") is not None for record in records):
+        if scores.max() > 0:
+            scores /= scores.max()
+    return np.clip(scores, 0.0, 1.0)
+
+
+def recency_scores(records: List[Dict], half_life_days: float, now: Optional[datetime] = None) -> np.ndarray:
+    """exp(-ln 2 * age / half_life), 0 for entries with no usable timestamp"""
+    now = now or datetime.now(timezone.utc)
+    timestamps = [_parse_timestamp(record.get("created_at")) for record in records]
+    ages = np.asarray(
+        [(now - ts).total_seconds() / 86400 if ts else np.inf for ts in timestamps],
+        dtype=np.float64
+    )
+    return np.exp(-math.log(2) * np.maximum(ages, 0.0) / max(half_life_days, 1e-6)).astype(np.float32)
+
+
+def importance_scores(records: List[Dict]) -> np.ndarray:
+    """Mean of length, source and emotional-intensity scores, each in [0, 1]"""
+    contents = [record.get("content") or "" for record in records]
+
+    lengths = np.asarray([len(content) for content in contents], dtype=np.float32)
+    length_score = np.minimum(np.log1p(lengths) / math.log1p(LENGTH_SATURATION_CHARS), 1.0)
+
+    source_score = np.asarray(
+        [SOURCE_IMPORTANCE.get(record.get("source"), DEFAULT_SOURCE_IMPORTANCE) for record in records],
+        dtype=np.float32
+    )
+
+    emotion_hits = np.asarray(
+        [sum(1 for word in WORD_PATTERN.findall(content.lower()) if word in EMOTION_WORDS) for content in contents],
+        dtype=np.float32
+    )
+    intensity_score = 1.0 - np.exp(-emotion_hits / 3.0)
+
+    return (length_score + source_score + intensity_score) / 3.0
+
+
+def rank_records(
+    records: List[Dict],
+    relevance_weight: float = 0.7,
+    recency_weight: float = 0.2,
+    importance_weight: float = 0.1,
+    half_life_days: float = 30.0,
+) -> List[Dict]:
+    """
+    Sort records by the weighted score, best first
+
+    Each returned record carries its combined score as "score".
+    """
+    if not records:
+        return records
+
+    scores = (
+        relevance_weight * _relevance(records)
+        + recency_weight * recency_scores(records, half_life_days)
+        + importance_weight * importance_scores(records)
+    )
+    order = np.argsort(-scores, kind="stable")
+    return [{**records[i], "score": float(scores[i])} for i in order]
@@ -0,0 +1,88 @@
+"""
+Retrieval Cache
+In-process cache of search results, versioned by a per-user generation
+
+A user's journal only changes on ingest, so the chat and meditation flows,
+which repeat the same lookups between writes, can be served from memory with
+no embedding call or database round trip. Every write bumps the user's
+generation, which makes all earlier results for that user unreachable. The
+TTL bounds staleness from writes made by other worker processes.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+from app.services.embedding_cache import normalize_text
+
+CacheKey = Tuple[str, int, Hashable]
+
+
+class RetrievalCache:
+    """LRU cache with per-entry expiry, keyed by (user, generation, query params)"""
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def bump(self, user_id: str) -> None:
+        """Record a write to the user's journal; older results are never served again"""
+        self._generations[user_id] = self.generation(user_id) + 1
+        self.invalidations += 1
+
+    def make_key(self, user_id: str, query: str, *params: Hashable) -> CacheKey:
+        return (user_id, self.generation(user_id), (normalize_text(query),) + params)
+
+    def get(self, key: CacheKey) -> Optional[List[Dict]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, records = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers may mutate what they get back
+        return [dict(record) for record in records]
+
+    def set(self, key: CacheKey, records: List[Dict]) -> None:
+        # A write may have landed while this search ran
+        if key[1] != self.generation(key[0]):
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, [dict(record) for record in records])
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "users": len(self._generations),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
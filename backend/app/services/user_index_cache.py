@@ -0,0 +1,115 @@
+"""
+User Index Cache
+Shared LRU of per-user in-memory indexes (vector, lexical, dedup)
+
+Indexes are loaded lazily on first use (one load per user at a time),
+dropped after a TTL so other workers' writes get picked up, updated
+write-through on ingest, and evicted least-recently-used once the memory
+budget is exceeded. Subclasses only say how to build an index from the
+loader's rows; indexes expose an O(1) nbytes and remove(entry_id).
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List
+
+# Returns the journal rows an index is built from, for one user
+EntryLoader = Callable[[str], Awaitable[List[Dict]]]
+
+
+class UserIndexCache:
+    """LRU of per-user indexes bounded by a memory budget"""
+
+    def __init__(self, loader: EntryLoader, memory_budget_bytes: int, ttl_seconds: float):
+        self._loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[str, Any]" = OrderedDict()
+        self._loaded_at: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        self.total_bytes = 0  # Running sum of self._sizes
+        self.loads = 0
+        self.evictions = 0
+
+    def _build(self, user_id: str, rows: List[Dict]):
+        """A new index for the user from the loader's rows"""
+        raise NotImplementedError
+
+    async def get(self, user_id: str):
+        """Return the user's index, loading it on first use"""
+        index = self._fresh(user_id)
+        if index is not None:
+            return index
+
+        lock = self._load_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            index = self._fresh(user_id)
+            if index is None:
+                index = self._build(user_id, await self._loader(user_id))
+                self._indexes[user_id] = index
+                self._loaded_at[user_id] = time.monotonic()
+                self._resize(user_id)
+                self.loads += 1
+                self._evict(keep=user_id)
+        self._load_locks.pop(user_id, None)
+        return index
+
+    def loaded(self, user_id: str):
+        """The user's index if it is in memory (no load, no LRU touch)"""
+        return self._indexes.get(user_id)
+
+    def updated(self, user_id: str) -> None:
+        """Account for a write-through change to the user's index"""
+        if user_id in self._indexes:
+            self._resize(user_id)
+            self._evict(keep=user_id)
+
+    def remove_entry(self, user_id: str, entry_id: str) -> None:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(entry_id)
+            self._resize(user_id)
+
+    def invalidate(self, user_id: str) -> None:
+        self._drop(user_id)
+
+    def _fresh(self, user_id: str):
+        index = self._indexes.get(user_id)
+        if index is None:
+            return None
+        # Other workers may have written since we loaded; reload periodically
+        if time.monotonic() - self._loaded_at[user_id] > self.ttl_seconds:
+            self._drop(user_id)
+            return None
+        self._indexes.move_to_end(user_id)
+        return index
+
+    def _resize(self, user_id: str) -> None:
+        size = self._indexes[user_id].nbytes
+        self.total_bytes += size - self._sizes.get(user_id, 0)
+        self._sizes[user_id] = size
+
+    def _drop(self, user_id: str) -> None:
+        if self._indexes.pop(user_id, None) is not None:
+            self.total_bytes -= self._sizes.pop(user_id, 0)
+            self._loaded_at.pop(user_id, None)
+
+    def _evict(self, keep: str) -> None:
+        while self.total_bytes > self.memory_budget_bytes and len(self._indexes) > 1:
+            user_id = next(iter(self._indexes))
+            if user_id == keep:
+                self._indexes.move_to_end(user_id)
+                continue
+            self._drop(user_id)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "users": len(self._indexes),
+            "memory_bytes": self.total_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
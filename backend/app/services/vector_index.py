@@ -0,0 +1,222 @@
+"""
+Vector Index Service
+In-process per-user journal vector index used as a hot cache in front of
+the pgvector search_journal_entries RPC.
+
+Each user's embeddings live in one contiguous matrix of L2-normalized rows
+(int8 or float16 quantized by default, see quantized_vectors), so a search is
+a single matrix-vector product plus a partial sort.
+Chunked entries contribute one row per passage instead of a whole-entry row.
+Indexes are loaded lazily on first search, updated write-through on ingest,
+and evicted least-recently-used once the memory budget is exceeded.
+"""
+
+import json
+import numpy as np
+from typing import Dict, List, Optional
+from app.services.quantized_vectors import QuantizedMatrix
+from app.services.user_index_cache import EntryLoader, UserIndexCache
+
+RESCORE_PER_RESULT = 8  # Quantized candidates re-scored precisely per requested result
+
+
+def parse_embedding(value) -> Optional[np.ndarray]:
+    """pgvector columns arrive from PostgREST as '[0.1,0.2,...]' strings"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class UserVectorIndex:
+    """All of one user's journal entries plus a matrix of their embeddings"""
+
+    def __init__(self, dimensions: int = 768, initial_capacity: int = 64, dtype: str = "float32", rescore: bool = True):
+        self.dimensions = dimensions
+        self.entries: List[Dict] = []  # Every entry, embedded or not (for recency fill)
+        self.rows: List[Dict] = []  # (entry, passage, chunk_index) backing each matrix row
+        self.vectors = QuantizedMatrix(dimensions, dtype, initial_capacity)
+        self.rescore = rescore
+        self.text_bytes = 0  # Entry text plus chunk passages, kept for O(1) nbytes
+
+    @property
+    def size(self) -> int:
+        return self.vectors.size
+
+    def add(self, entry: Dict, embedding: Optional[np.ndarray] = None, chunks: Optional[List[Dict]] = None) -> None:
+        self.entries.append(entry)
+        self.text_bytes += len(entry["content"])
+
+        chunk_rows = [
+            (chunk["content"], chunk["chunk_index"], parse_embedding(chunk.get("embedding")))
+            for chunk in chunks or []
+        ]
+        chunk_rows = [row for row in chunk_rows if row[2] is not None]
+        if chunk_rows:
+            for content, chunk_index, chunk_embedding in chunk_rows:
+                self._add_row(entry, content, chunk_index, chunk_embedding)
+        elif embedding is not None:
+            self._add_row(entry, entry["content"], None, embedding)
+
+    def _add_row(self, entry: Dict, content: str, chunk_index: Optional[int], embedding: np.ndarray) -> None:
+        if embedding.shape[-1] != self.dimensions:
+            return
+
+        self.vectors.append(normalize_rows(embedding))
+        self.rows.append({"entry": entry, "content": content, "chunk_index": chunk_index})
+        if chunk_index is not None:
+            self.text_bytes += len(content)
+
+    def remove(self, entry_id: str) -> None:
+        """Drop an entry (e.g. superseded by a near-duplicate) and its rows"""
+        self.text_bytes -= sum(len(entry["content"]) for entry in self.entries if entry["id"] == entry_id)
+        self.entries = [entry for entry in self.entries if entry["id"] != entry_id]
+        keep = np.asarray([row["entry"]["id"] != entry_id for row in self.rows], dtype=bool)
+        if keep.all():
+            return
+        self.text_bytes -= sum(
+            len(row["content"]) for row, kept_row in zip(self.rows, keep)
+            if not kept_row and row["chunk_index"] is not None
+        )
+        self.vectors.keep(keep)
+        self.rows = [row for row, kept_row in zip(self.rows, keep) if kept_row]
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.text_bytes
+
+    def search(
+        self,
+        query_embedding: Optional[List[float]],
+        top_k: int,
+        match_threshold: float,
+        snippet_length: int,
+    ) -> List[Dict]:
+        """Same contract as the search_journal_entries RPC, computed locally"""
+        semantic = []
+        similarities = None
+
+        if query_embedding is not None and self.size:
+            query = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+            if query.shape[-1] == self.dimensions:
+                similarities = self.vectors.scores(
+                    query, rescore_top=top_k * RESCORE_PER_RESULT if self.rescore else 0
+                )
+                candidates = np.flatnonzero(similarities > match_threshold)
+                candidates = candidates[np.argsort(-similarities[candidates])]
+
+                # Best passage per entry
+                matched = set()
+                for i in candidates:
+                    row = self.rows[i]
+                    if row["entry"]["id"] in matched:
+                        continue
+                    matched.add(row["entry"]["id"])
+                    semantic.append(self._record(
+                        row["entry"], float(similarities[i]), "semantic", snippet_length,
+                        content=row["content"], chunk_index=row["chunk_index"]
+                    ))
+                    if len(semantic) == top_k:
+                        break
+
+        if len(semantic) >= top_k:
+            return semantic
+
+        # Top up with the most recent entries, like the RPC does
+        row_similarity = {}
+        if similarities is not None:
+            for row, sim in zip(self.rows, similarities):
+                if row["chunk_index"] is None:
+                    row_similarity[row["entry"]["id"]] = float(sim)
+        matched = {record["id"] for record in semantic}
+        recent = sorted(
+            (entry for entry in self.entries if entry["id"] not in matched),
+            key=lambda entry: entry["created_at"],
+            reverse=True
+        )[:top_k - len(semantic)]
+
+        return semantic + [
+            self._record(entry, row_similarity.get(entry["id"]), "recent", snippet_length)
+            for entry in recent
+        ]
+
+    @staticmethod
+    def _record(
+        entry: Dict,
+        similarity: Optional[float],
+        match_type: str,
+        snippet_length: int,
+        content: Optional[str] = None,
+        chunk_index: Optional[int] = None,
+    ) -> Dict:
+        return {
+            "id": entry["id"],
+            "content": (content if content is not None else entry["content"])[:snippet_length],
+            "similarity": similarity,
+            "created_at": entry["created_at"],
+            "match_type": match_type,
+            "chunk_index": chunk_index,
+            "source": entry.get("source"),
+        }
+
+
+class VectorIndexCache(UserIndexCache):
+    """LRU of per-user vector indexes bounded by a memory budget"""
+
+    def __init__(
+        self,
+        loader: EntryLoader,
+        memory_budget_bytes: int,
+        ttl_seconds: float,
+        dimensions: int = 768,
+        dtype: str = "float32",
+        rescore: bool = True
+    ):
+        super().__init__(loader, memory_budget_bytes, ttl_seconds)
+        self.dimensions = dimensions
+        self.dtype = dtype
+        self.rescore = rescore
+
+    def _build(self, user_id: str, rows: List[Dict]) -> UserVectorIndex:
+        index = UserVectorIndex(self.dimensions, dtype=self.dtype, rescore=self.rescore)
+        for row in rows:
+            index.add(
+                {"id": row["id"], "content": row["content"], "created_at": row["created_at"], "source": row.get("source")},
+                parse_embedding(row.get("embedding")),
+                row.get("chunks")
+            )
+
+        print(f"[VECTOR INDEX] Loaded {index.size}/{len(index.entries)} embedded entries for user {user_id}")
+        return index
+
+    def add_entry(
+        self,
+        user_id: str,
+        entry: Dict,
+        embedding: Optional[List[float]],
+        chunks: Optional[List[Dict]] = None
+    ) -> None:
+        """Write-through on ingest; unloaded users pick the row up on first load"""
+        index = self.loaded(user_id)
+        if index is None:
+            return
+        index.add(
+            {"id": entry["id"], "content": entry["content"], "created_at": entry["created_at"], "source": entry.get("source")},
+            np.asarray(embedding, dtype=np.float32) if embedding is not None else None,
+            chunks
+        )
+        self.updated(user_id)
+
+    def stats(self) -> Dict:
+        return {
+            **super().stats(),
+            "vectors": sum(index.size for index in self._indexes.values()),
+            "dtype": self.dtype,
+        }
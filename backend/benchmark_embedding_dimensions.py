@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Embedding dimensions benchmark - recall and cost of truncated vectors
+
+Loads stored 768-dim journal embeddings from Supabase, uses a sample of them
+as queries (leave-one-out, within each user's journal, like search does),
+and compares top-k from truncated vectors against the full-size top-k:
+
+    dims | recall@k | matrix MB | query payload KB | search ms
+
+Run from the backend directory (uses the same .env as the API):
+    python benchmark_embedding_dimensions.py --dims 512,256,128 --top-k 5
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from app.database import get_supabase
+from app.services.vector_index import normalize_rows, parse_embedding
+
+supabase = get_supabase()
+PAGE_SIZE = 1000
+
+
+def load_embeddings(user_id: str = None, limit: int = 20_000):
+    """(user ids, float32 matrix) of stored full-size embeddings"""
+    users, vectors = [], []
+    while len(vectors) < limit:
+        query = supabase.table("journal_entries").select("user_id, embedding").not_.is_("embedding", "null")
+        if user_id:
+            query = query.eq("user_id", user_id)
+        page = query.order("id").range(len(vectors), len(vectors) + PAGE_SIZE - 1).execute().data or []
+        for row in page:
+            users.append(row["user_id"])
+            vectors.append(parse_embedding(row["embedding"]))
+        if len(page) < PAGE_SIZE:
+            break
+    return np.asarray(users[:limit]), np.stack(vectors[:limit]).astype(np.float32)
+
+
+def top_k_per_query(matrix: np.ndarray, users: np.ndarray, query_rows: np.ndarray, k: int):
+    """Top-k row indexes for each query row among its own user's rows, excluding itself"""
+    results = []
+    for row in query_rows:
+        candidates = np.flatnonzero(users == users[row])
+        candidates = candidates[candidates != row]
+        scores = matrix[candidates] @ matrix[row]
+        take = min(k, len(candidates))
+        best = candidates[np.argpartition(-scores, take - 1)[:take]] if take else candidates
+        results.append(set(best.tolist()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency of truncated text-embedding-004 vectors")
+    parser.add_argument("--dims", default="512,256,128", help="Comma-separated truncated sizes to compare")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--user-id", help="Only this user's journal (default: everyone, up to --limit rows)")
+    parser.add_argument("--limit", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    users, full = load_embeddings(args.user_id, args.limit)
+    print(f"Loaded {len(full):,} embeddings from {len(set(users.tolist())):,} users")
+
+    # Only users with more than top_k other entries make a meaningful query
+    counts = {user: count for user, count in zip(*np.unique(users, return_counts=True))}
+    eligible = np.asarray([i for i, user in enumerate(users) if counts[user] > args.top_k])
+    if not len(eligible):
+        raise SystemExit(f"No user has more than {args.top_k} embedded entries")
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(eligible, size=min(args.queries, len(eligible)), replace=False)
+
+    full_matrix = normalize_rows(full)
+    truth = top_k_per_query(full_matrix, users, query_rows, args.top_k)
+
+    print(f"\n{len(query_rows)} queries, recall@{args.top_k} against full 768-dim search\n")
+    print("| dims | recall | matrix MB | query payload KB | search ms/query |")
+    print("|-----:|-------:|----------:|-----------------:|----------------:|")
+    for dims in [full.shape[1]] + [int(d) for d in args.dims.split(",") if d]:
+        matrix = normalize_rows(full[:, :dims])
+        started = time.perf_counter()
+        results = top_k_per_query(matrix, users, query_rows, args.top_k)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(query_rows)
+
+        hits = sum(len(got & expected) for got, expected in zip(results, truth))
+        recall = hits / sum(len(expected) for expected in truth)
+        payload_kb = len(json.dumps(full[0, :dims].tolist())) / 1024
+        print(f"| {dims:>4} | {recall:6.3f} | {matrix.nbytes / 2**20:9.1f} | {payload_kb:16.1f} | {elapsed_ms:15.3f} |")
+
+
+if __name__ == "__main__":
+    main()
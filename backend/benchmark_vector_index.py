@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Vector index benchmark - latency and recall of per-user top-k search
+
+Loads synthetic journal vectors into a scratch table, then compares:
+  exact       user_id btree + sort (what small users get today)
+  ivfflat     the old index (lists = 100), per probes value
+  hnsw        the new index, per ef_search value (iterative scan if available)
+
+Recall is measured against the exact per-user top-k. The ANN runs drop the
+user_id btree so the ANN path is what gets timed. Needs a Postgres with
+pgvector and psycopg 3 (pip install "psycopg[binary]"); never run it
+against production, the scratch table is dropped and recreated.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmark_vector_index.py --rows 10000,100000,1000000
+"""
+
+import argparse
+import os
+import statistics
+import time
+import numpy as np
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+TABLE = "bench_journal_vectors"
+
+
+def to_vector_literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+def generate_vectors(rng: np.random.Generator, count: int, dims: int, centers: np.ndarray) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise"""
+    assigned = centers[rng.integers(0, len(centers), size=count)]
+    vectors = assigned + rng.normal(scale=0.35, size=(count, dims)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_table(conn, rng: np.random.Generator, rows: int, users: int, dims: int, centers: np.ndarray) -> np.ndarray:
+    """Create and fill the scratch table; returns each row's user id"""
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cur.execute(f"CREATE UNLOGGED TABLE {TABLE} (id BIGSERIAL PRIMARY KEY, user_id INT NOT NULL, embedding VECTOR({dims}))")
+
+    # Zipf-like skew: a few heavy journalers, a long tail of light ones
+    weights = 1.0 / np.arange(1, users + 1) ** 0.8
+    user_ids = rng.choice(users, size=rows, p=weights / weights.sum())
+
+    batch = 10_000
+    with conn.cursor() as cur:
+        for start in range(0, rows, batch):
+            vectors = generate_vectors(rng, min(batch, rows - start), dims, centers)
+            with cur.copy(f"COPY {TABLE} (user_id, embedding) FROM STDIN") as copy:
+                for user_id, vector in zip(user_ids[start:start + batch], vectors):
+                    copy.write_row((int(user_id), to_vector_literal(vector)))
+        cur.execute(f"ANALYZE {TABLE}")
+    return user_ids
+
+
+def run_queries(conn, queries, top_k: int, settings: dict) -> tuple:
+    """Per-user top-k for every query; returns (result id lists, latencies in ms)"""
+    results, latencies = [], []
+    with conn.cursor() as cur:
+        for name, value in settings.items():
+            try:
+                cur.execute(f"SET {name} = {value}")
+            except psycopg.Error:
+                pass  # Older pgvector without this setting
+        for user_id, vector in queries:
+            started = time.perf_counter()
+            cur.execute(
+                f"SELECT id FROM {TABLE} WHERE user_id = %s ORDER BY embedding <=> %s::vector LIMIT %s",
+                (user_id, vector, top_k)
+            )
+            ids = [row[0] for row in cur.fetchall()]
+            latencies.append((time.perf_counter() - started) * 1000)
+            results.append(ids)
+        cur.execute("RESET ALL")
+    return results, latencies
+
+
+def recall(results, truth) -> float:
+    hits = sum(len(set(got) & set(expected)) for got, expected in zip(results, truth))
+    total = sum(len(expected) for expected in truth)
+    return hits / total if total else 1.0
+
+
+def report(label: str, rows: int, results, latencies, truth) -> None:
+    p50 = statistics.median(latencies)
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    print(f"| {rows:>9,} | {label:<22} | {recall(results, truth):6.3f} | {p50:8.2f} | {p95:8.2f} |")
+
+
+def benchmark(conn, rows: int, args, rng: np.random.Generator) -> None:
+    centers = rng.normal(size=(64, args.dims)).astype(np.float32)
+    user_ids = load_table(conn, rng, rows, args.users, args.dims, centers)
+
+    # Query the users that actually have entries, weighted like real traffic
+    query_users = rng.choice(user_ids, size=args.queries)
+    queries = [
+        (int(user_id), to_vector_literal(vector))
+        for user_id, vector in zip(query_users, generate_vectors(rng, args.queries, args.dims, centers))
+    ]
+
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE INDEX ON {TABLE} (user_id)")
+    truth, latencies = run_queries(conn, queries, args.top_k, {"enable_seqscan": "off"})
+    report("exact (user_id btree)", rows, truth, latencies, truth)
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP INDEX IF EXISTS {TABLE}_user_id_idx")
+
+    if "ivfflat" in args.indexes:
+        with conn.cursor() as cur:
+            cur.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+            started = time.perf_counter()
+            cur.execute(f"CREATE INDEX bench_ivfflat ON {TABLE} USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)")
+            print(f"|           | ivfflat build {time.perf_counter() - started:7.1f}s |        |          |          |")
+        for probes in args.probes:
+            results, latencies = run_queries(conn, queries, args.top_k, {
+                "ivfflat.probes": probes, "ivfflat.iterative_scan": "relaxed_order"
+            })
+            report(f"ivfflat probes={probes}", rows, results, latencies, truth)
+        with conn.cursor() as cur:
+            cur.execute("DROP INDEX bench_ivfflat")
+
+    if "hnsw" in args.indexes:
+        with conn.cursor() as cur:
+            cur.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+            started = time.perf_counter()
+            cur.execute(f"CREATE INDEX bench_hnsw ON {TABLE} USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)")
+            print(f"|           | hnsw build {time.perf_counter() - started:10.1f}s |        |          |          |")
+        for ef_search in args.ef_search:
+            results, latencies = run_queries(conn, queries, args.top_k, {
+                "hnsw.ef_search": ef_search, "hnsw.iterative_scan": "relaxed_order"
+            })
+            report(f"hnsw ef_search={ef_search}", rows, results, latencies, truth)
+
+
+def parse_ints(value: str):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-user pgvector search (exact vs IVFFlat vs HNSW)")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default: $DATABASE_URL)")
+    parser.add_argument("--rows", type=parse_ints, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef-search", type=parse_ints, default=[40, 100, 200])
+    parser.add_argument("--probes", type=parse_ints, default=[1, 10])
+    parser.add_argument("--indexes", default="ivfflat,hnsw", help="Comma-separated: ivfflat,hnsw")
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if psycopg is None:
+        raise SystemExit('psycopg is required: pip install "psycopg[binary]"')
+    if not args.database_url:
+        raise SystemExit("Set DATABASE_URL or pass --database-url (a scratch database, not production)")
+
+    rng = np.random.default_rng(args.seed)
+    # Autocommit: a rejected SET (older pgvector) must not abort the session
+    with psycopg.connect(args.database_url, autocommit=True) as conn:
+        print(f"\n{args.queries} queries, top-{args.top_k}, {args.users:,} users, {args.dims} dims\n")
+        print("|      rows | method                 | recall | p50 (ms) | p95 (ms) |")
+        print("|----------:|:-----------------------|-------:|---------:|---------:|")
+        for rows in args.rows:
+            benchmark(conn, rows, args, rng)
+
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+if __name__ == "__main__":
+    main()
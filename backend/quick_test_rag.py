@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Quick RAG test - no interactive prompts"""
 
+import asyncio
 from app.services.rag import generate_embedding
 from app.database import get_supabase
 
@@ -14,14 +15,11 @@ test_queries = [
     "Feeling anxious about relationships"
 ]
 
-print("🔬 RAG VECTOR SEARCH TEST\n")
-print("="*60)
-
-for query in test_queries:
+async def run_query_test(query: str):
     print(f"\n🔍 Query: \"{query}\"")
 
     # Generate embedding
-    query_embedding = generate_embedding(query)
+    query_embedding = await generate_embedding(query, task_type="retrieval_query")
 
     # Search
     result = supabase.rpc('match_journal_entries', {
@@ -49,5 +47,16 @@ for query in test_queries:
     else:
         print("   ⚠️  No matches found")
 
+
+async def main():
+    for query in test_queries:
+        await run_query_test(query)
+
+
+print("🔬 RAG VECTOR SEARCH TEST\n")
+print("="*60)
+
+asyncio.run(main())
+
 print("\n" + "="*60)
 print("✅ RAG system is working correctly!")
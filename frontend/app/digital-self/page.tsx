@@ -3,7 +3,7 @@
 import { motion } from 'framer-motion'
 import { ParticleBackground } from '@/components/zen/ParticleBackground'
 import { Navigation } from '@/components/zen/Navigation'
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL
 
@@ -38,9 +38,12 @@ export default function DigitalSelf() {
     ],
   })
   const [isRegenerating, setIsRegenerating] = useState(false)
+  const [regenerationStage, setRegenerationStage] = useState<string | null>(null)
+  const eventSourceRef = useRef<EventSource | null>(null)
 
   useEffect(() => {
     fetchInsights()
+    return () => eventSourceRef.current?.close()
   }, [])
 
   const fetchInsights = async () => {
@@ -53,6 +56,47 @@ export default function DigitalSelf() {
     }
   }
 
+  const finishRegeneration = () => {
+    eventSourceRef.current?.close()
+    eventSourceRef.current = null
+    setIsRegenerating(false)
+    setRegenerationStage(null)
+  }
+
+  // Regeneration runs as a background job; follow it over Server-Sent Events
+  const followJob = (jobId: string) => {
+    eventSourceRef.current?.close()
+    const eventSource = new EventSource(`${API_URL}/api/digital-self/jobs/${jobId}/events`)
+    eventSourceRef.current = eventSource
+
+    eventSource.onmessage = (event) => {
+      try {
+        const data = JSON.parse(event.data)
+
+        if (data.type === 'status') {
+          setRegenerationStage(data.stage)
+          if (data.status === 'succeeded' && data.result?.insights) {
+            setInsights(data.result.insights)
+          } else if (data.status === 'failed') {
+            console.error('Error regenerating insights:', data.error)
+          }
+        } else if (data.type === 'complete') {
+          finishRegeneration()
+        } else if (data.type === 'error') {
+          console.error('Error regenerating insights:', data.message)
+          finishRegeneration()
+        }
+      } catch (err) {
+        console.error('Failed to parse regeneration event:', err)
+      }
+    }
+
+    eventSource.onerror = (err) => {
+      console.error('Regeneration EventSource error:', err)
+      finishRegeneration()
+    }
+  }
+
   const handleRegenerate = async () => {
     try {
       setIsRegenerating(true)
@@ -63,13 +107,14 @@ export default function DigitalSelf() {
       })
       const data = await response.json()
 
-      if (data.status === 'success') {
-        setInsights(data.insights)
+      if (data.jobId) {
+        followJob(data.jobId)
+      } else {
+        finishRegeneration()
       }
     } catch (error) {
       console.error('Error regenerating insights:', error)
-    } finally {
-      setIsRegenerating(false)
+      finishRegeneration()
     }
   }
 
@@ -118,7 +163,7 @@ export default function DigitalSelf() {
                       opacity: isRegenerating ? 0.6 : 1,
                     }}
                   >
-                    {isRegenerating ? 'Regenerating...' : '↻ Regenerate Insights'}
+                    {isRegenerating ? `Regenerating${regenerationStage ? ` (${regenerationStage})` : ''}...` : '↻ Regenerate Insights'}
                   </button>
                 </div>
               </div>
@@ -42,6 +42,16 @@ SELECT * FROM match_journal_entries(
     'user-uuid-here'::uuid
 );
 
+-- Search with recency fill-in and snippets in one round trip
+-- (pass NULL as the embedding for pure recency)
+SELECT * FROM search_journal_entries(
+    '[0.1, 0.2, ...]'::vector(768),  -- query embedding
+    0.7,  -- similarity threshold
+    3,    -- results (topped up with recent entries)
+    'user-uuid-here'::uuid,
+    1000  -- snippet length in characters
+);
+
 -- Get recent entries (fallback when embeddings fail)
 SELECT * FROM get_recent_journal_entries(
     'user-uuid-here'::uuid,
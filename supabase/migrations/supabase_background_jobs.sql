@@ -0,0 +1,25 @@
+-- Background job state (digital self regeneration)
+-- Run this in Supabase SQL Editor (after supabase_digital_self_write.sql)
+
+-- Needed only with JOB_STORE_BACKEND=supabase. Jobs run inside the API
+-- process that accepted them; this table makes their status visible to
+-- every API worker and keeps it across restarts.
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id UUID PRIMARY KEY,
+    kind TEXT NOT NULL,
+    user_id UUID NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued, running, succeeded, failed
+    stage TEXT,
+    progress FLOAT DEFAULT 0.0,
+    attempts INT NOT NULL DEFAULT 0,
+    params JSONB NOT NULL DEFAULT '{}'::jsonb,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Per-user dedup lookup only ever looks at active jobs
+CREATE INDEX IF NOT EXISTS background_jobs_active_idx
+ON background_jobs (user_id, kind, created_at DESC)
+WHERE status IN ('queued', 'running');
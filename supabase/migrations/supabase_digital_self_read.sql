@@ -0,0 +1,60 @@
+-- Single round-trip read of the latest digital self insight
+-- Run this in Supabase SQL Editor (after digital_self_schema.sql)
+
+-- The API used to read the insight row and then each of its five child
+-- tables separately. This returns the whole latest insight as one JSON
+-- document, or NULL if the user has none yet. Child lookups filter on
+-- (user_id, insight_id) so they use the existing per-table indexes.
+
+-- Each list is stored in the order the analyzer ranked it (most central
+-- first) and read back in that order. Rows saved before sort_order existed
+-- fall back to their scores, then insertion time.
+ALTER TABLE digital_self_values ADD COLUMN IF NOT EXISTS sort_order INT;
+ALTER TABLE digital_self_patterns ADD COLUMN IF NOT EXISTS sort_order INT;
+ALTER TABLE digital_self_themes ADD COLUMN IF NOT EXISTS sort_order INT;
+ALTER TABLE digital_self_tensions ADD COLUMN IF NOT EXISTS sort_order INT;
+ALTER TABLE digital_self_keywords ADD COLUMN IF NOT EXISTS sort_order INT;
+
+CREATE OR REPLACE FUNCTION get_latest_digital_self_insight(target_user_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'id', i.id,
+        'analysis_date', i.analysis_date,
+        'journal_entries_analyzed', i.journal_entries_analyzed,
+        'values', COALESCE((
+            SELECT jsonb_agg(v.value_name ORDER BY v.sort_order NULLS LAST, v.confidence_score DESC, v.created_at)
+            FROM digital_self_values v
+            WHERE v.user_id = i.user_id AND v.insight_id = i.id
+        ), '[]'::jsonb),
+        'patterns', COALESCE((
+            SELECT jsonb_agg(p.pattern_text ORDER BY p.sort_order NULLS LAST, p.created_at)
+            FROM digital_self_patterns p
+            WHERE p.user_id = i.user_id AND p.insight_id = i.id
+        ), '[]'::jsonb),
+        'themes', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('name', t.theme_name, 'description', t.description)
+                ORDER BY t.sort_order NULLS LAST, t.created_at
+            )
+            FROM digital_self_themes t
+            WHERE t.user_id = i.user_id AND t.insight_id = i.id
+        ), '[]'::jsonb),
+        'tensions', COALESCE((
+            SELECT jsonb_agg(t.tension_description ORDER BY t.sort_order NULLS LAST, t.created_at)
+            FROM digital_self_tensions t
+            WHERE t.user_id = i.user_id AND t.insight_id = i.id
+        ), '[]'::jsonb),
+        'keywords', COALESCE((
+            SELECT jsonb_agg(k.keyword ORDER BY k.sort_order NULLS LAST, k.frequency DESC, k.created_at)
+            FROM digital_self_keywords k
+            WHERE k.user_id = i.user_id AND k.insight_id = i.id
+        ), '[]'::jsonb)
+    )
+    FROM digital_self_insights i
+    WHERE i.user_id = target_user_id
+    ORDER BY i.updated_at DESC
+    LIMIT 1;
+$$;
@@ -0,0 +1,59 @@
+-- Atomic single-call save of a digital self insight
+-- Run this in Supabase SQL Editor (after supabase_digital_self_read.sql)
+
+-- Takes the analysis JSON exactly as the API produces it:
+--   {"coreValues": [...], "emotionalPatterns": [...],
+--    "identityThemes": [{"name": ..., "description": ...} | "name", ...],
+--    "tensions": [...], "keywords": [...], "journalEntriesAnalyzed": n,
+--    "analysisDate": "<timestamptz, optional, defaults to now>",
+--    "valueConfidence": {"Value1": 0.75, ...},     (optional, default 0.8)
+--    "keywordFrequencies": {"word1": 3, ...}}      (optional, default 1)
+-- and writes the insight row plus every child row in one transaction, so a
+-- failure part-way never leaves a half-written insight for readers to pick
+-- up. Each list's order is kept in sort_order. Returns the new insight id.
+CREATE OR REPLACE FUNCTION save_digital_self_insight(target_user_id UUID, analysis JSONB)
+RETURNS UUID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_insight_id UUID;
+BEGIN
+    -- analysisDate is the created_at of the newest analysed entry;
+    -- incremental analysis picks up entries created after it
+    INSERT INTO digital_self_insights (user_id, journal_entries_analyzed, analysis_date)
+    VALUES (
+        target_user_id,
+        COALESCE((analysis->>'journalEntriesAnalyzed')::INT, 0),
+        COALESCE((analysis->>'analysisDate')::TIMESTAMPTZ, NOW())
+    )
+    RETURNING id INTO new_insight_id;
+
+    INSERT INTO digital_self_values (insight_id, user_id, value_name, confidence_score, sort_order)
+    SELECT new_insight_id, target_user_id, left(value, 100), COALESCE((analysis->'valueConfidence'->>value)::FLOAT, 0.8), ordinality
+    FROM jsonb_array_elements_text(COALESCE(analysis->'coreValues', '[]'::jsonb)) WITH ORDINALITY AS items(value, ordinality);
+
+    INSERT INTO digital_self_patterns (insight_id, user_id, pattern_text, category, sort_order)
+    SELECT new_insight_id, target_user_id, pattern, 'emotional', ordinality
+    FROM jsonb_array_elements_text(COALESCE(analysis->'emotionalPatterns', '[]'::jsonb)) WITH ORDINALITY AS items(pattern, ordinality);
+
+    -- The model sometimes returns bare theme names instead of objects
+    INSERT INTO digital_self_themes (insight_id, user_id, theme_name, description, sort_order)
+    SELECT
+        new_insight_id,
+        target_user_id,
+        left(CASE WHEN jsonb_typeof(theme) = 'object' THEN COALESCE(theme->>'name', '') ELSE theme #>> '{}' END, 100),
+        CASE WHEN jsonb_typeof(theme) = 'object' THEN COALESCE(theme->>'description', '') ELSE '' END,
+        ordinality
+    FROM jsonb_array_elements(COALESCE(analysis->'identityThemes', '[]'::jsonb)) WITH ORDINALITY AS items(theme, ordinality);
+
+    INSERT INTO digital_self_tensions (insight_id, user_id, tension_description, sort_order)
+    SELECT new_insight_id, target_user_id, tension, ordinality
+    FROM jsonb_array_elements_text(COALESCE(analysis->'tensions', '[]'::jsonb)) WITH ORDINALITY AS items(tension, ordinality);
+
+    INSERT INTO digital_self_keywords (insight_id, user_id, keyword, frequency, sort_order)
+    SELECT new_insight_id, target_user_id, left(keyword, 50), COALESCE((analysis->'keywordFrequencies'->>keyword)::INT, 1), ordinality
+    FROM jsonb_array_elements_text(COALESCE(analysis->'keywords', '[]'::jsonb)) WITH ORDINALITY AS items(keyword, ordinality);
+
+    RETURN new_insight_id;
+END;
+$$;
@@ -0,0 +1,196 @@
+-- Reduced-dimension (256) journal embeddings
+-- Run this in Supabase SQL Editor (after supabase_hnsw_index.sql)
+-- Requires pgvector >= 0.7.0 (subvector)
+
+-- text-embedding-004 vectors can be truncated: the first 256 dimensions are
+-- what the API returns for output_dimensionality = 256 (cosine similarity
+-- ignores the difference in norm). Smaller vectors mean a 3x smaller HNSW
+-- index and a 3x smaller query payload on every search, for a small loss of
+-- recall (measure yours with backend/benchmark_embedding_dimensions.py).
+--
+-- Rollout:
+--   1. Run this migration. Existing rows are filled from their full vectors
+--      and a trigger keeps embedding_256 in sync while the API still writes
+--      768-dim vectors.
+--   2. Set EMBEDDING_DIMENSIONS=256 in the backend. New rows are then
+--      written to embedding_256 only, and search uses
+--      search_journal_entries_256.
+--   3. Rolling back is setting EMBEDDING_DIMENSIONS=768 again; rows written
+--      at 256 dims are re-embedded by the embedding backfill.
+
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS embedding_256 VECTOR(256);
+ALTER TABLE journal_entry_chunks ADD COLUMN IF NOT EXISTS embedding_256 VECTOR(256);
+
+UPDATE journal_entries
+SET embedding_256 = subvector(embedding, 1, 256)::VECTOR(256)
+WHERE embedding IS NOT NULL AND embedding_256 IS NULL;
+
+UPDATE journal_entry_chunks
+SET embedding_256 = subvector(embedding, 1, 256)::VECTOR(256)
+WHERE embedding IS NOT NULL AND embedding_256 IS NULL;
+
+-- Keep the reduced column in sync with full-size writes
+CREATE OR REPLACE FUNCTION sync_embedding_256()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.embedding IS NOT NULL THEN
+        NEW.embedding_256 := subvector(NEW.embedding, 1, 256)::VECTOR(256);
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS journal_entries_sync_embedding_256 ON journal_entries;
+CREATE TRIGGER journal_entries_sync_embedding_256
+BEFORE INSERT OR UPDATE OF embedding ON journal_entries
+FOR EACH ROW EXECUTE FUNCTION sync_embedding_256();
+
+DROP TRIGGER IF EXISTS journal_entry_chunks_sync_embedding_256 ON journal_entry_chunks;
+CREATE TRIGGER journal_entry_chunks_sync_embedding_256
+BEFORE INSERT OR UPDATE OF embedding ON journal_entry_chunks
+FOR EACH ROW EXECUTE FUNCTION sync_embedding_256();
+
+SET maintenance_work_mem = '256MB';
+
+CREATE INDEX IF NOT EXISTS journal_entries_embedding_256_hnsw_idx
+ON journal_entries
+USING hnsw (embedding_256 vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS journal_entry_chunks_embedding_256_hnsw_idx
+ON journal_entry_chunks
+USING hnsw (embedding_256 vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+RESET maintenance_work_mem;
+
+-- Same contract as search_journal_entries, over the 256-dim columns
+CREATE OR REPLACE FUNCTION search_journal_entries_256(
+    query_embedding VECTOR(256),
+    match_threshold FLOAT,
+    match_count INT,
+    user_id UUID,
+    snippet_length INT DEFAULT 1000,
+    ef_search INT DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ,
+    match_type TEXT,
+    chunk_index INT,
+    source TEXT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    -- Per-call HNSW candidate list size (recall vs latency); pgvector's
+    -- default is 40. is_local = true scopes it to this RPC's transaction.
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::TEXT, true);
+    END IF;
+
+    -- pgvector >= 0.8: keep scanning the graph until enough rows pass the
+    -- user_id filter instead of returning too few. Older versions reject
+    -- the setting, which is fine to ignore.
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;
+    END;
+
+    RETURN QUERY
+    WITH entry_candidates AS (
+        -- Whole-entry vectors for entries that were not chunked. The bare
+        -- ORDER BY distance LIMIT lets the planner pick the HNSW index for
+        -- users with many entries (user_id and the other filters are then
+        -- applied by the iterative scan) or the user_id index for small ones.
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            je.embedding_256 <=> query_embedding AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries_256.user_id
+            AND query_embedding IS NOT NULL
+            AND je.embedding_256 IS NOT NULL
+            AND je.superseded_by IS NULL
+            AND NOT EXISTS (SELECT 1 FROM journal_entry_chunks c WHERE c.entry_id = je.id)
+        ORDER BY je.embedding_256 <=> query_embedding
+        LIMIT match_count
+    ),
+    chunk_candidates AS (
+        -- Passage vectors for chunked entries; several passages may belong
+        -- to one entry, so fetch more than match_count
+        SELECT
+            c.entry_id,
+            c.chunk_index,
+            c.content,
+            c.embedding_256 <=> query_embedding AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entry_chunks c
+        JOIN journal_entries je ON je.id = c.entry_id
+        WHERE c.user_id = search_journal_entries_256.user_id
+            AND query_embedding IS NOT NULL
+            AND c.embedding_256 IS NOT NULL
+            AND je.superseded_by IS NULL
+        ORDER BY c.embedding_256 <=> query_embedding
+        LIMIT match_count * 4
+    ),
+    candidates AS (
+        SELECT * FROM entry_candidates
+        UNION ALL
+        SELECT * FROM chunk_candidates
+    ),
+    best_per_entry AS (
+        SELECT DISTINCT ON (candidates.entry_id) candidates.*
+        FROM candidates
+        WHERE 1 - candidates.distance > match_threshold
+        ORDER BY candidates.entry_id, candidates.distance
+    ),
+    semantic AS (
+        SELECT * FROM best_per_entry
+        ORDER BY best_per_entry.distance
+        LIMIT match_count
+    ),
+    recent AS (
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            CASE
+                WHEN query_embedding IS NOT NULL AND je.embedding_256 IS NOT NULL
+                THEN je.embedding_256 <=> query_embedding
+            END AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries_256.user_id
+            AND je.superseded_by IS NULL
+            AND je.id NOT IN (SELECT semantic.entry_id FROM semantic)
+        ORDER BY je.created_at DESC
+        LIMIT GREATEST(match_count - (SELECT COUNT(*) FROM semantic), 0)
+    )
+    SELECT results.entry_id, results.content, results.similarity, results.created_at,
+           results.match_type, results.chunk_index, results.source
+    FROM (
+        SELECT s.entry_id, LEFT(s.content, snippet_length) AS content,
+               (1 - s.distance)::FLOAT AS similarity, s.created_at,
+               'semantic'::TEXT AS match_type, s.chunk_index, s.source, 0 AS match_rank
+        FROM semantic s
+        UNION ALL
+        SELECT r.entry_id, LEFT(r.content, snippet_length) AS content,
+               (1 - r.distance)::FLOAT AS similarity, r.created_at,
+               'recent'::TEXT AS match_type, r.chunk_index, r.source, 1 AS match_rank
+        FROM recent r
+    ) results
+    ORDER BY results.match_rank, results.similarity DESC NULLS LAST, results.created_at DESC;
+END;
+$$;
@@ -0,0 +1,160 @@
+-- Switch journal vector search from IVFFlat to HNSW
+-- Run this in Supabase SQL Editor (after supabase_journal_entry_source.sql)
+-- Requires pgvector >= 0.5.0 (HNSW); iterative scans need >= 0.8.0
+
+-- The IVFFlat indexes were built with lists = 100 over every user's rows and
+-- are never retrained, so recall drops as the table grows, and the per-user
+-- filter runs after the ANN scan. HNSW needs no training, keeps recall
+-- stable as rows are added, and with iterative scans it keeps walking the
+-- graph until enough rows pass the user_id filter.
+DROP INDEX IF EXISTS journal_entries_embedding_idx;
+DROP INDEX IF EXISTS journal_entry_chunks_embedding_idx;
+
+-- Building over a large table is memory hungry; raise this for the session
+-- if the build spills to disk (Supabase allows up to the instance's RAM)
+SET maintenance_work_mem = '256MB';
+
+CREATE INDEX IF NOT EXISTS journal_entries_embedding_hnsw_idx
+ON journal_entries
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS journal_entry_chunks_embedding_hnsw_idx
+ON journal_entry_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+RESET maintenance_work_mem;
+
+-- New optional ef_search parameter changes the signature, so drop first
+DROP FUNCTION IF EXISTS search_journal_entries;
+
+-- Same contract as before; each candidate branch is now an index-friendly
+-- ORDER BY distance LIMIT, and ef_search is tunable per call
+CREATE OR REPLACE FUNCTION search_journal_entries(
+    query_embedding VECTOR(768),
+    match_threshold FLOAT,
+    match_count INT,
+    user_id UUID,
+    snippet_length INT DEFAULT 1000,
+    ef_search INT DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ,
+    match_type TEXT,
+    chunk_index INT,
+    source TEXT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    -- Per-call HNSW candidate list size (recall vs latency); pgvector's
+    -- default is 40. is_local = true scopes it to this RPC's transaction.
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::TEXT, true);
+    END IF;
+
+    -- pgvector >= 0.8: keep scanning the graph until enough rows pass the
+    -- user_id filter instead of returning too few. Older versions reject
+    -- the setting, which is fine to ignore.
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;
+    END;
+
+    RETURN QUERY
+    WITH entry_candidates AS (
+        -- Whole-entry vectors for entries that were not chunked. The bare
+        -- ORDER BY distance LIMIT lets the planner pick the HNSW index for
+        -- users with many entries (user_id and the other filters are then
+        -- applied by the iterative scan) or the user_id index for small ones.
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            je.embedding <=> query_embedding AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND query_embedding IS NOT NULL
+            AND je.embedding IS NOT NULL
+            AND je.superseded_by IS NULL
+            AND NOT EXISTS (SELECT 1 FROM journal_entry_chunks c WHERE c.entry_id = je.id)
+        ORDER BY je.embedding <=> query_embedding
+        LIMIT match_count
+    ),
+    chunk_candidates AS (
+        -- Passage vectors for chunked entries; several passages may belong
+        -- to one entry, so fetch more than match_count
+        SELECT
+            c.entry_id,
+            c.chunk_index,
+            c.content,
+            c.embedding <=> query_embedding AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entry_chunks c
+        JOIN journal_entries je ON je.id = c.entry_id
+        WHERE c.user_id = search_journal_entries.user_id
+            AND query_embedding IS NOT NULL
+            AND c.embedding IS NOT NULL
+            AND je.superseded_by IS NULL
+        ORDER BY c.embedding <=> query_embedding
+        LIMIT match_count * 4
+    ),
+    candidates AS (
+        SELECT * FROM entry_candidates
+        UNION ALL
+        SELECT * FROM chunk_candidates
+    ),
+    best_per_entry AS (
+        SELECT DISTINCT ON (candidates.entry_id) candidates.*
+        FROM candidates
+        WHERE 1 - candidates.distance > match_threshold
+        ORDER BY candidates.entry_id, candidates.distance
+    ),
+    semantic AS (
+        SELECT * FROM best_per_entry
+        ORDER BY best_per_entry.distance
+        LIMIT match_count
+    ),
+    recent AS (
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            CASE
+                WHEN query_embedding IS NOT NULL AND je.embedding IS NOT NULL
+                THEN je.embedding <=> query_embedding
+            END AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND je.superseded_by IS NULL
+            AND je.id NOT IN (SELECT semantic.entry_id FROM semantic)
+        ORDER BY je.created_at DESC
+        LIMIT GREATEST(match_count - (SELECT COUNT(*) FROM semantic), 0)
+    )
+    SELECT results.entry_id, results.content, results.similarity, results.created_at,
+           results.match_type, results.chunk_index, results.source
+    FROM (
+        SELECT s.entry_id, LEFT(s.content, snippet_length) AS content,
+               (1 - s.distance)::FLOAT AS similarity, s.created_at,
+               'semantic'::TEXT AS match_type, s.chunk_index, s.source, 0 AS match_rank
+        FROM semantic s
+        UNION ALL
+        SELECT r.entry_id, LEFT(r.content, snippet_length) AS content,
+               (1 - r.distance)::FLOAT AS similarity, r.created_at,
+               'recent'::TEXT AS match_type, r.chunk_index, r.source, 1 AS match_rank
+        FROM recent r
+    ) results
+    ORDER BY results.match_rank, results.similarity DESC NULLS LAST, results.created_at DESC;
+END;
+$$;
@@ -0,0 +1,124 @@
+-- Chunk-level embeddings for long journal entries
+-- Run this in Supabase SQL Editor (after supabase_search_journal_entries.sql)
+
+-- Long entries (e.g. synthesized follow-up sessions) are split into
+-- passages that are embedded separately, so search can return the one
+-- passage that matches instead of the whole diluted entry.
+CREATE TABLE IF NOT EXISTS journal_entry_chunks (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    entry_id UUID NOT NULL REFERENCES journal_entries(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding VECTOR(768),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (entry_id, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS journal_entry_chunks_user_idx
+ON journal_entry_chunks(user_id, entry_id);
+
+-- HNSW rather than IVFFlat: the table starts empty, and IVFFlat lists
+-- trained on no rows give poor recall until the index is rebuilt.
+-- Requires pgvector >= 0.5.0; same index as supabase_hnsw_index.sql.
+CREATE INDEX IF NOT EXISTS journal_entry_chunks_embedding_hnsw_idx
+ON journal_entry_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Return type changes (chunk_index), so the function must be dropped first
+DROP FUNCTION IF EXISTS search_journal_entries;
+
+-- Same contract as before, but chunked entries are matched by their best
+-- passage: content is that passage and chunk_index says which one. id is
+-- always the parent journal entry.
+CREATE OR REPLACE FUNCTION search_journal_entries(
+    query_embedding VECTOR(768),
+    match_threshold FLOAT,
+    match_count INT,
+    user_id UUID,
+    snippet_length INT DEFAULT 1000
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ,
+    match_type TEXT,
+    chunk_index INT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        -- Whole-entry vectors for entries that were not chunked
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            je.embedding <=> query_embedding AS distance,
+            je.created_at
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND query_embedding IS NOT NULL
+            AND je.embedding IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM journal_entry_chunks c WHERE c.entry_id = je.id)
+        UNION ALL
+        -- Passage vectors for chunked entries
+        SELECT
+            c.entry_id,
+            c.chunk_index,
+            c.content,
+            c.embedding <=> query_embedding AS distance,
+            je.created_at
+        FROM journal_entry_chunks c
+        JOIN journal_entries je ON je.id = c.entry_id
+        WHERE c.user_id = search_journal_entries.user_id
+            AND query_embedding IS NOT NULL
+            AND c.embedding IS NOT NULL
+    ),
+    best_per_entry AS (
+        SELECT DISTINCT ON (candidates.entry_id) candidates.*
+        FROM candidates
+        WHERE 1 - candidates.distance > match_threshold
+        ORDER BY candidates.entry_id, candidates.distance
+    ),
+    semantic AS (
+        SELECT * FROM best_per_entry
+        ORDER BY best_per_entry.distance
+        LIMIT match_count
+    ),
+    recent AS (
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            CASE
+                WHEN query_embedding IS NOT NULL AND je.embedding IS NOT NULL
+                THEN je.embedding <=> query_embedding
+            END AS distance,
+            je.created_at
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND je.id NOT IN (SELECT semantic.entry_id FROM semantic)
+        ORDER BY je.created_at DESC
+        LIMIT GREATEST(match_count - (SELECT COUNT(*) FROM semantic), 0)
+    )
+    SELECT results.entry_id, results.content, results.similarity, results.created_at,
+           results.match_type, results.chunk_index
+    FROM (
+        SELECT s.entry_id, LEFT(s.content, snippet_length) AS content,
+               (1 - s.distance)::FLOAT AS similarity, s.created_at,
+               'semantic'::TEXT AS match_type, s.chunk_index, 0 AS match_rank
+        FROM semantic s
+        UNION ALL
+        SELECT r.entry_id, LEFT(r.content, snippet_length) AS content,
+               (1 - r.distance)::FLOAT AS similarity, r.created_at,
+               'recent'::TEXT AS match_type, r.chunk_index, 1 AS match_rank
+        FROM recent r
+    ) results
+    ORDER BY results.match_rank, results.similarity DESC NULLS LAST, results.created_at DESC;
+END;
+$$;
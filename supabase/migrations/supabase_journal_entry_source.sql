@@ -0,0 +1,115 @@
+-- Entry source for importance-weighted ranking
+-- Run this in Supabase SQL Editor (after supabase_journal_entry_dedup.sql)
+
+-- 'entry' (raw journal entry), 'synthesized' (entry woven together with
+-- follow-up answers) or 'meditation'. The API weighs synthesized sessions
+-- higher when ranking memories.
+ALTER TABLE journal_entries
+ADD COLUMN IF NOT EXISTS source TEXT NOT NULL DEFAULT 'entry';
+
+-- Existing meditation reflections are recognisable by their prefix
+UPDATE journal_entries
+SET source = 'meditation'
+WHERE content LIKE '[Meditation Reflection]%' AND source = 'entry';
+
+-- Return type changes (source), so the function must be dropped first
+DROP FUNCTION IF EXISTS search_journal_entries;
+
+-- Same contract as before, plus the entry's source
+CREATE OR REPLACE FUNCTION search_journal_entries(
+    query_embedding VECTOR(768),
+    match_threshold FLOAT,
+    match_count INT,
+    user_id UUID,
+    snippet_length INT DEFAULT 1000
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ,
+    match_type TEXT,
+    chunk_index INT,
+    source TEXT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        -- Whole-entry vectors for entries that were not chunked
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            je.embedding <=> query_embedding AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND query_embedding IS NOT NULL
+            AND je.embedding IS NOT NULL
+            AND je.superseded_by IS NULL
+            AND NOT EXISTS (SELECT 1 FROM journal_entry_chunks c WHERE c.entry_id = je.id)
+        UNION ALL
+        -- Passage vectors for chunked entries
+        SELECT
+            c.entry_id,
+            c.chunk_index,
+            c.content,
+            c.embedding <=> query_embedding AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entry_chunks c
+        JOIN journal_entries je ON je.id = c.entry_id
+        WHERE c.user_id = search_journal_entries.user_id
+            AND query_embedding IS NOT NULL
+            AND c.embedding IS NOT NULL
+            AND je.superseded_by IS NULL
+    ),
+    best_per_entry AS (
+        SELECT DISTINCT ON (candidates.entry_id) candidates.*
+        FROM candidates
+        WHERE 1 - candidates.distance > match_threshold
+        ORDER BY candidates.entry_id, candidates.distance
+    ),
+    semantic AS (
+        SELECT * FROM best_per_entry
+        ORDER BY best_per_entry.distance
+        LIMIT match_count
+    ),
+    recent AS (
+        SELECT
+            je.id AS entry_id,
+            NULL::INT AS chunk_index,
+            je.content,
+            CASE
+                WHEN query_embedding IS NOT NULL AND je.embedding IS NOT NULL
+                THEN je.embedding <=> query_embedding
+            END AS distance,
+            je.created_at,
+            je.source
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND je.superseded_by IS NULL
+            AND je.id NOT IN (SELECT semantic.entry_id FROM semantic)
+        ORDER BY je.created_at DESC
+        LIMIT GREATEST(match_count - (SELECT COUNT(*) FROM semantic), 0)
+    )
+    SELECT results.entry_id, results.content, results.similarity, results.created_at,
+           results.match_type, results.chunk_index, results.source
+    FROM (
+        SELECT s.entry_id, LEFT(s.content, snippet_length) AS content,
+               (1 - s.distance)::FLOAT AS similarity, s.created_at,
+               'semantic'::TEXT AS match_type, s.chunk_index, s.source, 0 AS match_rank
+        FROM semantic s
+        UNION ALL
+        SELECT r.entry_id, LEFT(r.content, snippet_length) AS content,
+               (1 - r.distance)::FLOAT AS similarity, r.created_at,
+               'recent'::TEXT AS match_type, r.chunk_index, r.source, 1 AS match_rank
+        FROM recent r
+    ) results
+    ORDER BY results.match_rank, results.similarity DESC NULLS LAST, results.created_at DESC;
+END;
+$$;
@@ -0,0 +1,68 @@
+-- One-round-trip journal retrieval with built-in recency fallback
+-- Run this in Supabase SQL Editor
+
+-- Returns the top match_count entries above match_threshold by cosine
+-- similarity. If fewer than match_count pass (or query_embedding is NULL
+-- because embedding failed), the remainder is filled with the user's most
+-- recent entries in the same call. Content is truncated to snippet_length.
+CREATE OR REPLACE FUNCTION search_journal_entries(
+    query_embedding VECTOR(768),
+    match_threshold FLOAT,
+    match_count INT,
+    user_id UUID,
+    snippet_length INT DEFAULT 1000
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ,
+    match_type TEXT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH semantic AS (
+        SELECT
+            je.id,
+            je.content,
+            (1 - (je.embedding <=> query_embedding))::FLOAT AS similarity,
+            je.created_at
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND query_embedding IS NOT NULL
+            AND je.embedding IS NOT NULL
+            AND 1 - (je.embedding <=> query_embedding) > match_threshold
+        ORDER BY je.embedding <=> query_embedding
+        LIMIT match_count
+    ),
+    recent AS (
+        SELECT
+            je.id,
+            je.content,
+            CASE
+                WHEN query_embedding IS NOT NULL AND je.embedding IS NOT NULL
+                THEN (1 - (je.embedding <=> query_embedding))::FLOAT
+            END AS similarity,
+            je.created_at
+        FROM journal_entries je
+        WHERE je.user_id = search_journal_entries.user_id
+            AND je.id NOT IN (SELECT semantic.id FROM semantic)
+        ORDER BY je.created_at DESC
+        LIMIT GREATEST(match_count - (SELECT COUNT(*) FROM semantic), 0)
+    )
+    SELECT results.id, results.content, results.similarity, results.created_at, results.match_type
+    FROM (
+        SELECT s.id, LEFT(s.content, snippet_length) AS content, s.similarity, s.created_at,
+               'semantic'::TEXT AS match_type, 0 AS match_rank
+        FROM semantic s
+        UNION ALL
+        SELECT r.id, LEFT(r.content, snippet_length) AS content, r.similarity, r.created_at,
+               'recent'::TEXT AS match_type, 1 AS match_rank
+        FROM recent r
+    ) results
+    ORDER BY results.match_rank, results.similarity DESC NULLS LAST, results.created_at DESC;
+END;
+$$;